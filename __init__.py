@@ -16,6 +16,7 @@ Core dependencies:
 
 Optional dependencies:
 - Celery + Redis: For distributed processing (install with pip install "pasture[celery]")
+- orjson + xxhash + google-re2: For faster cache serialization, key hashing and JSON extraction (install with pip install "pasture[fast]")
 """
 
 import importlib.util
@@ -57,6 +58,7 @@ if celery_installed and redis_installed:
             DistributedPipeline,
             celery_app,
             process_model,
+            process_model_batch,
             run_pipeline_step
         )
         
@@ -66,6 +68,7 @@ if celery_installed and redis_installed:
             'DistributedPipeline',
             'celery_app',
             'process_model',
+            'process_model_batch',
             'run_pipeline_step'
         ])
     except ImportError as e:
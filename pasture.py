@@ -20,20 +20,28 @@ Core dependencies:
 """
 
 import asyncio
+import contextlib
+import copy
+import functools
+import importlib.util
 import json
 import logging
 import os
 import sys
 import time
 import traceback
-from typing import Any, Dict, List, Optional, Tuple, Union, Callable, Type
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union, Callable, Type
 from abc import ABC, abstractmethod
 from datetime import datetime
 from pathlib import Path
 import re
 import hashlib
 import random
+import string
+from collections import ChainMap, OrderedDict
+import _string
 from enum import Enum
+from types import MappingProxyType
 
 import aiohttp
 from pydantic import (
@@ -56,7 +64,6 @@ from tenacity import (
     before_sleep_log,
     RetryError,
     wait_random_exponential,
-    wait_chain,
     retry_unless_exception_type
 )
 
@@ -68,6 +75,42 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# orjson is optional; it speeds up (de)serialization of cache entries, model output and API bodies
+orjson_installed = importlib.util.find_spec("orjson") is not None
+# xxhash is optional; it speeds up hashing of cache keys into filenames
+xxhash_installed = importlib.util.find_spec("xxhash") is not None
+# google-re2 is optional; its linear-time engine scans long model output for JSON
+re2_installed = importlib.util.find_spec("re2") is not None
+
+if orjson_installed:
+    import orjson
+    
+    def _json_dumps(obj: Any) -> bytes:
+        """Serialize an object to JSON bytes"""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    
+    def _json_dumps_str(obj: Any) -> str:
+        """Serialize an object to a JSON string, as aiohttp's json_serialize expects"""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    
+    _json_loads = orjson.loads
+else:
+    def _json_dumps(obj: Any) -> bytes:
+        """Serialize an object to JSON bytes"""
+        return json.dumps(obj).encode('utf-8')
+    
+    _json_dumps_str = json.dumps
+    _json_loads = json.loads
+
+if xxhash_installed:
+    import xxhash
+
+if re2_installed:
+    import re2
+    _extract_re = re2
+else:
+    _extract_re = re
+
 ###########################################
 ## CORE CONFIGURATION                   ##
 ###########################################
@@ -107,6 +150,7 @@ class RetryConfig(BaseModel):
     strategy: RetryStrategy = Field(default=RetryStrategy.EXPONENTIAL, description="Retry backoff strategy")
     min_wait: confloat(ge=0) = Field(default=1.0, description="Minimum wait time in seconds")
     max_wait: confloat(ge=0) = Field(default=30.0, description="Maximum wait time in seconds")
+    status_forcelist: List[int] = Field(default=[429, 500, 502, 503, 504], description="HTTP status codes from the Ollama API that are retried")
     
     @field_validator('max_wait')
     def validate_max_wait(cls, v, info):
@@ -120,6 +164,7 @@ class CacheConfig(BaseModel):
     enabled: bool = Field(default=True, description="Enable caching")
     dir: str = Field(default="./cache", description="Cache directory")
     default_ttl: Optional[conint(ge=0)] = Field(default=3600, description="Default TTL in seconds")
+    max_entries: Optional[conint(gt=0)] = Field(default=None, description="Maximum number of cached entries, admitted by frequency once full (None for unbounded); needs a per-process cache dir")
     
     @field_validator('dir')
     def validate_dir(cls, v):
@@ -147,6 +192,12 @@ class JSONPatchingConfig(BaseModel):
             logger.warning(f"High max_attempts value ({v}) may lead to excessive API calls")
         return v
 
+class DistributedConfig(BaseModel):
+    """Configuration for distributed (Celery) execution"""
+    max_batch_size: conint(ge=1) = Field(default=1, description="Maximum model requests coalesced into one Celery task (1 disables batching)")
+    batch_window_ms: confloat(ge=0) = Field(default=5.0, description="Time to wait for more requests before submitting a batch, in milliseconds")
+    inline: bool = Field(default=False, description="Run model requests in-process when no Celery workers are available")
+
 class Config(BaseModel):
     """Configuration for the PASTURE framework"""
     # Core settings
@@ -157,13 +208,23 @@ class Config(BaseModel):
     
     # HTTP settings
     request_timeout: confloat(gt=0) = Field(default=90.0, description="Timeout for API requests in seconds")
+    stream_responses: bool = Field(default=False, description="Stream generations from Ollama and assemble them chunk by chunk")
+    http_pool_size: conint(ge=0) = Field(
+        default_factory=lambda: max(100, (os.cpu_count() or 1) * 5),
+        description="Maximum number of simultaneous HTTP connections (0 for no limit)"
+    )
+    http_pool_size_per_host: conint(ge=0) = Field(default=0, description="Maximum simultaneous connections per host (0 for no limit)")
     
     # Retry settings
     retry: RetryConfig = Field(default_factory=RetryConfig, description="Retry configuration")
     
+    # Distributed settings
+    distributed: DistributedConfig = Field(default_factory=DistributedConfig, description="Distributed execution configuration")
+    
     # Model settings
     preload_models: bool = Field(default=True, description="Preload models before using them")
     sequential_execution: bool = Field(default=True, description="Execute models sequentially")
+    fail_fast: bool = Field(default=False, description="Abort a pipeline run and cancel its running steps on the first failed step")
     fallback_threshold: conint(ge=0) = Field(default=2, description="Number of failures before using fallback model")
     min_response_length: conint(ge=0) = Field(default=10, description="Minimum acceptable response length in characters")
     
@@ -300,17 +361,123 @@ class CacheEntry(BaseModel):
     created_at: float
     expires_at: Optional[float] = None
 
+class _FrequencySketch:
+    """
+    Count-min sketch of recent access frequencies for TinyLFU cache admission.
+    
+    Keys are the cache's hashed file names; each of the four rows of 4-bit
+    saturating counters is indexed by a different 32-bit slice of the hash.
+    Once ``10 * width`` accesses have been recorded all counters are halved,
+    so the sketch follows shifts in popularity.
+    """
+    _HALVE = bytes(count >> 1 for count in range(256))
+    
+    def __init__(self, width: int = 16384) -> None:
+        self._width = width
+        self._rows = [bytearray(width) for _ in range(4)]
+        self._additions = 0
+        self._sample_size = 10 * width
+    
+    def _indexes(self, hashed_key: str) -> List[int]:
+        value = int(hashed_key, 16)
+        return [(value >> (32 * row)) % self._width for row in range(4)]
+    
+    def increment(self, hashed_key: str) -> None:
+        """Record one access of a key"""
+        for row, index in zip(self._rows, self._indexes(hashed_key)):
+            if row[index] < 15:
+                row[index] += 1
+        
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._rows = [row.translate(self._HALVE) for row in self._rows]
+            self._additions //= 2
+    
+    def frequency(self, hashed_key: str) -> int:
+        """Estimate how often a key was accessed recently"""
+        return min(row[index] for row, index in zip(self._rows, self._indexes(hashed_key)))
+
 class FileCache:
     """File-based cache implementation with hash-based keys"""
-    def __init__(self, cache_dir: str) -> None:
+    def __init__(self, cache_dir: str, max_entries: Optional[int] = None) -> None:
         self._cache_dir = Path(cache_dir)
         self._cache_dir.mkdir(parents=True, exist_ok=True)
-        self._lock = asyncio.Lock()  # Asyncio lock for cache operations
+        # One lock per shard of the key space, so concurrent steps only wait on
+        # each other for keys in the same shard while file I/O runs off the loop
+        self._locks = [asyncio.Lock() for _ in range(16)]
+        
+        # A bounded cache keeps its entries in LRU order and admits a new entry
+        # over the LRU victim only if the key is accessed more often (TinyLFU),
+        # so a burst of one-off prompts cannot flush frequently reused responses.
+        # The index and sketch live in this process only, so a bounded cache
+        # needs a cache_dir of its own rather than one shared between processes
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, None]" = OrderedDict()
+        self._sketch: Optional[_FrequencySketch] = None
+        if max_entries is not None:
+            self._sketch = _FrequencySketch()
+            files = []
+            for path in self._cache_dir.glob("*.json"):
+                try:
+                    files.append((path.stat().st_mtime, path.stem))
+                except OSError:
+                    # Evicted by another process since the glob
+                    continue
+            files.sort()
+            self._entries.update((stem, None) for _, stem in files)
     
     def _hash_key(self, key: str) -> str:
         """Create a hash of the key for safe filenames"""
+        # Filenames only need to be stable and collision-free, not cryptographic
+        if xxhash_installed:
+            return xxhash.xxh3_128_hexdigest(key.encode('utf-8'))
         return hashlib.md5(key.encode('utf-8')).hexdigest()
     
+    def _shard_lock(self, hashed_key: str) -> asyncio.Lock:
+        """Get the lock guarding the shard a hashed key belongs to"""
+        return self._locks[int(hashed_key[-2:], 16) & 15]
+    
+    @contextlib.asynccontextmanager
+    async def _all_shards_locked(self):
+        """Hold every shard lock, for operations spanning the whole cache"""
+        async with contextlib.AsyncExitStack() as stack:
+            for lock in self._locks:
+                await stack.enter_async_context(lock)
+            yield
+    
+    def _admit(self, hashed_key: str) -> Tuple[bool, Optional[str]]:
+        """
+        Record a write to a bounded cache and decide whether to store it.
+        
+        Returns:
+            Tuple[bool, Optional[str]]: Whether to store the entry, and the LRU
+            victim it displaced, whose file the caller must remove with _evict
+        """
+        self._sketch.increment(hashed_key)
+        if hashed_key in self._entries:
+            self._entries.move_to_end(hashed_key)
+            return True, None
+        
+        victim = None
+        if len(self._entries) >= self._max_entries:
+            victim = next(iter(self._entries))
+            if self._sketch.frequency(hashed_key) <= self._sketch.frequency(victim):
+                return False, None
+            del self._entries[victim]
+        
+        self._entries[hashed_key] = None
+        return True, victim
+    
+    async def _evict(self, hashed_key: str) -> None:
+        """Delete an evicted entry's file under its own shard lock, unless it was re-admitted meanwhile"""
+        async with self._shard_lock(hashed_key):
+            if hashed_key in self._entries:
+                return
+            file_path = self._cache_dir / f"{hashed_key}.json"
+            await asyncio.get_event_loop().run_in_executor(
+                None, functools.partial(file_path.unlink, missing_ok=True)
+            )
+    
     @retry(
         stop_after_attempt(3),
         wait_exponential(multiplier=1, min=0.1, max=1.0),
@@ -320,23 +487,28 @@ class FileCache:
     async def get(self, key: str) -> Optional[Any]:
         """Get a value from cache with error handling and retries"""
         try:
-            async with self._lock:  # Use asyncio lock to prevent concurrent access
-                file_path = self._cache_dir / f"{self._hash_key(key)}.json"
-                if file_path.exists():
-                    with open(file_path, 'r') as f:
-                        data = json.load(f)
-                        entry = CacheEntry(**data)
-                        
-                        # Check if the cached data has expired
-                        if entry.expires_at is not None and entry.expires_at < time.time():
-                            logger.debug(f"Cache entry for {key} has expired")
-                            return None
-                            
-                        logger.debug(f"Cache hit for {key}")
-                        return entry.value
+            hashed_key = self._hash_key(key)
+            async with self._shard_lock(hashed_key):
+                file_path = self._cache_dir / f"{hashed_key}.json"
+                if self._sketch is not None:
+                    self._sketch.increment(hashed_key)
+                    if hashed_key in self._entries:
+                        self._entries.move_to_end(hashed_key)
+                try:
+                    raw = await asyncio.get_event_loop().run_in_executor(None, file_path.read_bytes)
+                    data = _json_loads(raw)
+                except FileNotFoundError:
+                    logger.debug(f"Cache miss for {key}")
+                    return None
                 
-                logger.debug(f"Cache miss for {key}")
-                return None
+                # Check if the cached data has expired
+                expires_at = data.get("expires_at")
+                if expires_at is not None and expires_at < time.time():
+                    logger.debug(f"Cache entry for {key} has expired")
+                    return None
+                    
+                logger.debug(f"Cache hit for {key}")
+                return data.get("value")
         except (json.JSONDecodeError, IOError) as e:
             logger.error(f"Error reading from cache: {e}")
             return None
@@ -350,68 +522,129 @@ class FileCache:
     async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
         """Set a value in cache with optional TTL and retries"""
         try:
-            async with self._lock:  # Use asyncio lock to prevent concurrent access
-                file_path = self._cache_dir / f"{self._hash_key(key)}.json"
+            hashed_key = self._hash_key(key)
+            victim = None
+            async with self._shard_lock(hashed_key):
+                if self._sketch is not None:
+                    admitted, victim = self._admit(hashed_key)
+                    if not admitted:
+                        logger.debug(f"Cache admission declined for {key}")
+                        return
+                file_path = self._cache_dir / f"{hashed_key}.json"
                 
-                entry = CacheEntry(
-                    value=value,
-                    created_at=time.time()
-                )
-                
-                # Add expiration if TTL is provided
-                if ttl is not None:
-                    entry.expires_at = time.time() + ttl
+                # Same layout as CacheEntry, without the model validation round-trip
+                now = time.time()
+                entry = {
+                    "value": value,
+                    "created_at": now,
+                    "expires_at": now + ttl if ttl is not None else None
+                }
                 
                 # Serialize the cache entry
-                with open(file_path, 'w') as f:
-                    json.dump(entry.model_dump(), f)
+                await asyncio.get_event_loop().run_in_executor(None, file_path.write_bytes, _json_dumps(entry))
                     
                 logger.debug(f"Cached value for {key}" + (f" with TTL {ttl}s" if ttl else ""))
+            
+            # Only after releasing this key's shard, so two writers never wait
+            # on each other's shards
+            if victim is not None:
+                await self._evict(victim)
         except IOError as e:
             logger.error(f"Error writing to cache: {e}")
             raise  # Re-raise for retry logic
 
+    @staticmethod
+    def _unlink(file_path: Path) -> bool:
+        """Delete a cache file if it exists, returning whether it did (blocking)"""
+        try:
+            file_path.unlink()
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def _clear_files(self) -> None:
+        """Delete every cache file (blocking)"""
+        for file_path in self._cache_dir.glob("*.json"):
+            self._unlink(file_path)
+    
+    def _scan_stats(self) -> Dict[str, Any]:
+        """Count and size the cache files for get_stats (blocking)"""
+        total = expired = size = 0
+        now = time.time()
+        for file_path in self._cache_dir.glob("*.json"):
+            try:
+                raw = file_path.read_bytes()
+            except OSError:
+                # Removed by another process since the glob
+                continue
+            total += 1
+            size += len(raw)
+            try:
+                data = _json_loads(raw)
+                if "expires_at" in data and data["expires_at"] < now:
+                    expired += 1
+            except:
+                pass
+        
+        return {
+            "total_entries": total,
+            "expired_entries": expired,
+            "active_entries": total - expired,
+            "cache_size_bytes": size
+        }
+    
     async def clear(self, key: Optional[str] = None) -> None:
         """Clear a specific cache entry or all entries"""
-        async with self._lock:
-            if key:
-                file_path = self._cache_dir / f"{self._hash_key(key)}.json"
-                if file_path.exists():
-                    file_path.unlink()
+        loop = asyncio.get_event_loop()
+        if key:
+            hashed_key = self._hash_key(key)
+            async with self._shard_lock(hashed_key):
+                self._entries.pop(hashed_key, None)
+                file_path = self._cache_dir / f"{hashed_key}.json"
+                if await loop.run_in_executor(None, self._unlink, file_path):
                     logger.debug(f"Cleared cache entry for {key}")
-            else:
-                # Clear all cache entries
-                for file_path in self._cache_dir.glob("*.json"):
-                    file_path.unlink()
-                logger.debug("Cleared all cache entries")
+            return
+        
+        async with self._all_shards_locked():
+            # Clear all cache entries
+            await loop.run_in_executor(None, self._clear_files)
+            self._entries.clear()
+            logger.debug("Cleared all cache entries")
 
     async def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the cache"""
-        async with self._lock:
-            files = list(self._cache_dir.glob("*.json"))
-            
-            # Count expired entries
-            expired = 0
-            for file_path in files:
-                try:
-                    with open(file_path, 'r') as f:
-                        data = json.load(f)
-                        if "expires_at" in data and data["expires_at"] < time.time():
-                            expired += 1
-                except:
-                    pass
-            
-            return {
-                "total_entries": len(files),
-                "expired_entries": expired,
-                "active_entries": len(files) - expired,
-                "cache_size_bytes": sum(file_path.stat().st_size for file_path in files)
-            }
+        async with self._all_shards_locked():
+            return await asyncio.get_event_loop().run_in_executor(None, self._scan_stats)
 
 ###########################################
 ## JSON PROCESSING                      ##
 ###########################################
 
+# Patterns used by JSONProcessor, compiled once
+_JSON_FENCE_PATTERN = _extract_re.compile(r'```(?:json)?\s*({[\s\S]*?})\s*```')
+_JSON_NAKED_PATTERN = _extract_re.compile(r'({[\s\S]*?})')
+# Tokens that repair_json rewrites, matched in a single left-to-right scan; string
+# literals are matched first so their contents are never rewritten
+_JSON_REPAIR_PATTERN = re.compile(r"""
+    (?P<double>"(?:[^"\\]|\\.)*")              # Double-quoted string
+  | (?P<single>'(?:[^'\\]|\\.)*')              # Single-quoted string
+  | (?P<comma>,)(?=\s*[\]}])                   # Trailing comma
+  | (?P<lead>[{,]\s*)(?P<key>\w+)(?=\s*:)            # Unquoted property name, numeric ones included
+""", re.VERBOSE)
+_UNESCAPED_DOUBLE_QUOTE_PATTERN = re.compile(r'(?<!\\)"')
+
+def _repair_json_token(match: re.Match) -> str:
+    """Rewrite one token matched by _JSON_REPAIR_PATTERN into valid JSON"""
+    kind = match.lastgroup
+    if kind == "double":
+        return match.group(0).replace("\n", "\\n")
+    if kind == "single":
+        content = match.group(0)[1:-1].replace("\\'", "'").replace("\n", "\\n")
+        return '"' + _UNESCAPED_DOUBLE_QUOTE_PATTERN.sub('\\\\"', content) + '"'
+    if kind == "comma":
+        return ""
+    return f'{match.group("lead")}"{match.group("key")}"'
+
 class JSONProcessor:
     """Advanced JSON processing with validation and repair"""
     
@@ -419,7 +652,7 @@ class JSONProcessor:
     def is_valid_json(json_str: str) -> bool:
         """Check if a string is valid JSON"""
         try:
-            json.loads(json_str)
+            _json_loads(json_str)
             return True
         except:
             return False
@@ -427,23 +660,13 @@ class JSONProcessor:
     @staticmethod
     def extract_json(text: str) -> Optional[str]:
         """Extract JSON from text that might contain other content"""
-        # Look for content wrapped in JSON or code blocks
-        json_pattern = r'```(?:json)?\s*({[\s\S]*?})\s*```'
-        matches = re.findall(json_pattern, text)
-        
-        if matches:
-            for match in matches:
-                if JSONProcessor.is_valid_json(match):
-                    return match
-        
-        # Try to find naked JSON objects
-        naked_pattern = r'({[\s\S]*?})'
-        matches = re.findall(naked_pattern, text)
-        
-        if matches:
-            for match in matches:
-                if JSONProcessor.is_valid_json(match):
-                    return match
+        # Look for content wrapped in JSON or code blocks, then for naked JSON objects;
+        # matches are scanned lazily so the search stops at the first valid one
+        for pattern in (_JSON_FENCE_PATTERN, _JSON_NAKED_PATTERN):
+            for match in pattern.finditer(text):
+                candidate = match.group(1)
+                if JSONProcessor.is_valid_json(candidate):
+                    return candidate
         
         return None
     
@@ -458,27 +681,27 @@ class JSONProcessor:
         """Attempt to fix common JSON formatting issues with retry logic"""
         fixed = json_str.strip()
         
+        # Strip a markdown code fence (and its language tag) around the whole input
+        if len(fixed) >= 6 and fixed.startswith("```") and fixed.endswith("```"):
+            body = fixed[3:-3]
+            tag, newline, rest = body.partition("\n")
+            fixed = (rest if newline and (not tag.strip() or tag.strip().isalpha()) else body).strip()
+        
         # Extract JSON if wrapped in markdown or other text
         extracted = JSONProcessor.extract_json(fixed)
         if extracted:
             fixed = extracted
             
-        # Fix common syntax issues
-        fixed = fixed.replace("'", '"')
-        fixed = re.sub(r',\s*([\]}])', r'\1', fixed)  # Remove trailing commas
-        
-        # Ensure property names are double-quoted
-        fixed = re.sub(r'(\w+)(?=\s*:)', r'"\1"', fixed)
-        
         # If not a JSON object, wrap it
         if not (fixed.startswith("{") and fixed.endswith("}")):
-            # Escape double quotes and newlines
-            content = fixed.replace('"', '\\"').replace('\n', '\\n')
-            fixed = f'{{"response": "{content}"}}'
+            return json.dumps({"response": fixed})
+        
+        # Fix single quotes, trailing commas and unquoted property names in one pass
+        fixed = _JSON_REPAIR_PATTERN.sub(_repair_json_token, fixed)
             
         # Validate the repaired JSON
         try:
-            json.loads(fixed)
+            _json_loads(fixed)
             return fixed
         except json.JSONDecodeError as e:
             logger.error(f"JSON repair failed: {e}")
@@ -491,14 +714,14 @@ class JSONProcessor:
             return {"response": "", "error": "empty_response"}
             
         try:
-            return json.loads(input_str)
+            return _json_loads(input_str)
         except json.JSONDecodeError:
             logger.warning(f"Initial JSON parsing failed, attempting repair...")
             
             try:
                 # Try extracting and repairing JSON
                 fixed_json = cls.repair_json(input_str)
-                return json.loads(fixed_json)
+                return _json_loads(fixed_json)
             except (json.JSONDecodeError, RetryError) as e:
                 logger.error(f"JSON repair failed after retries: {e}")
                 return {"response": input_str, "error": "json_parsing_failed"}
@@ -639,8 +862,66 @@ class ModelStatus(BaseModel):
     last_checked: Optional[float] = None
     last_used: Optional[float] = None
 
+# Points for name indicators of smaller, faster models, which are preferred as fallbacks
+_FALLBACK_SIZE_SCORES = {
+    "tiny": 50,
+    "mini": 40,
+    "small": 30,
+    "2b": 25,
+    "7b": 20,
+    "base": 10
+}
+
+@functools.lru_cache(maxsize=64)
+def _rank_fallback_models(models: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Order models by fallback preference: highest size score first, ties in catalog order"""
+    def score(model: str) -> int:
+        name = model.lower()
+        return sum(points for indicator, points in _FALLBACK_SIZE_SCORES.items() if indicator in name)
+    
+    return tuple(sorted(models, key=score, reverse=True))
+
+# Name fragments of models that cannot serve generation requests
+_EXCLUDED_MODEL_PATTERN = re.compile(r"embed|whisper|70b|32b\+|large", re.IGNORECASE)
+
+# Topic keywords of simulated prompts, found in a single case-insensitive scan of
+# the prompt as given; the first keyword in the prompt selects the response
+_SIMULATION_TOPIC_PATTERN = re.compile(
+    r"(?P<economic>economic)|(?P<social>social)|(?P<ethical>ethical)|(?P<integrated>combine|integrat)",
+    re.IGNORECASE
+)
+
 class ModelManager:
     """Manages interactions with AI models with resource management"""
+    # Read-only table of (response prefix, extra fields) per topic, built once;
+    # the fields are deep-copied into each response so callers can't mutate it
+    _SIM_RESPONSES = MappingProxyType({
+        "economic": ("Economic analysis simulation for: ", {
+            "economic_impacts": {
+                "short_term": "Increased automation and efficiency",
+                "medium_term": "Job market transformation",
+                "long_term": "New economic paradigms"
+            }
+        }),
+        "social": ("Social analysis simulation for: ", {
+            "social_impacts": {
+                "education": "Personalized learning experiences",
+                "healthcare": "Improved diagnostics and treatment",
+                "privacy": "New challenges in data protection"
+            }
+        }),
+        "ethical": ("Ethical analysis simulation for: ", {
+            "ethical_considerations": {
+                "autonomy": "Questions about human vs AI decision-making",
+                "bias": "Risks of perpetuating existing biases",
+                "responsibility": "Questions of liability for AI decisions"
+            }
+        }),
+        "integrated": ("Integrated analysis simulation for: ", {
+            "integrated_response": "AI will transform society across economic, social, and ethical dimensions."
+        })
+    })
+    
     def __init__(
         self, 
         config: Config, 
@@ -665,9 +946,23 @@ class ModelManager:
         )
     
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create an aiohttp session"""
+        """Get or create the aiohttp session shared by all requests of this manager"""
         if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(timeout=self.timeout)
+            # Keep connections to the Ollama server alive between calls and cache its
+            # DNS lookup, so sequential requests skip the TCP handshake and resolution.
+            # The pool is sized from the config so parallel steps are not capped at
+            # aiohttp's default of 100 connections
+            connector = aiohttp.TCPConnector(
+                limit=self.config.http_pool_size,
+                limit_per_host=self.config.http_pool_size_per_host,
+                keepalive_timeout=30,
+                ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                json_serialize=_json_dumps_str
+            )
         return self.session
         
     async def close(self) -> None:
@@ -675,14 +970,35 @@ class ModelManager:
         if self.session and not self.session.closed:
             await self.session.close()
     
-    @retry(
-        stop_after_attempt(3),
-        wait_chain(*[wait_fixed(1) for _ in range(2)] + [wait_exponential(multiplier=1, min=2, max=10)]),
-        retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError)),
-        before_sleep=before_sleep_log(logger, logging.WARNING)
-    )
-    async def _request(self, endpoint: str, method: str = "GET", json_data: Optional[Dict] = None) -> Dict:
-        """Make a request to the Ollama API with proper error handling and advanced retry logic"""
+    def _retry_delay(self, attempt: int) -> float:
+        """Get the backoff before retrying a request that failed on the given (0-based) attempt"""
+        retry_config = self.config.retry
+        if retry_config.strategy == RetryStrategy.FIXED:
+            return retry_config.min_wait
+        
+        delay = min(retry_config.min_wait * 2 ** attempt, retry_config.max_wait)
+        if retry_config.strategy == RetryStrategy.RANDOM_EXPONENTIAL:
+            return random.uniform(0, delay)
+        # Add some jitter so concurrent steps failing together don't retry in lockstep
+        return delay + random.uniform(0, 0.1 * delay)
+    
+    async def _request(
+        self,
+        endpoint: str,
+        method: str = "GET",
+        json_data: Optional[Dict] = None,
+        with_retry: bool = False
+    ) -> Dict:
+        """
+        Make a request to the Ollama API with proper error handling and optional retries.
+        
+        With ``with_retry``, timeouts, connection errors and responses with a
+        status in ``retry.status_forcelist`` are retried on the shared session
+        up to ``retry.max_attempts`` times, with non-blocking backoff following
+        ``retry.strategy``. Otherwise a single attempt is made, so health,
+        preload and unload probes fail fast. The last error is returned as an
+        error dict.
+        """
         url = f"{self.base_url}/api/{endpoint}"
         
         if self.config.debug_mode:
@@ -691,15 +1007,40 @@ class ModelManager:
                 self.logger.debug(f"Request payload: {json.dumps(json_data, indent=2)}")
         
         session = await self._get_session()
+        retry_config = self.config.retry
+        if not with_retry or retry_config.strategy == RetryStrategy.NONE:
+            attempts = 1
+        else:
+            attempts = retry_config.max_attempts
         
+        for attempt in range(attempts):
+            result, retryable = await self._send_request(session, endpoint, url, method, json_data)
+            if not retryable or attempt == attempts - 1:
+                return result
+            
+            delay = self._retry_delay(attempt)
+            self.logger.warning(
+                f"Retrying {endpoint} in {delay:.2f}s after {result['error']} (attempt {attempt + 1}/{attempts})"
+            )
+            await asyncio.sleep(delay)
+    
+    async def _send_request(
+        self,
+        session: aiohttp.ClientSession,
+        endpoint: str,
+        url: str,
+        method: str,
+        json_data: Optional[Dict]
+    ) -> Tuple[Optional[Dict], bool]:
+        """Make a single request attempt, returning the result and whether a failure is worth retrying"""
         try:
             if method == "GET":
                 async with session.get(url) as resp:
                     if resp.status != 200:
                         text = await resp.text()
                         self.logger.error(f"HTTP {resp.status} from Ollama API: {text}")
-                        return {"error": f"HTTP {resp.status}", "details": text}
-                    return await resp.json()
+                        return {"error": f"HTTP {resp.status}", "details": text}, resp.status in self.config.retry.status_forcelist
+                    return _json_loads(await resp.read()), False
             elif method == "POST":
                 async with session.post(url, json=json_data) as resp:
                     if resp.status != 200:
@@ -707,18 +1048,53 @@ class ModelManager:
                         self.logger.error(f"HTTP {resp.status} from Ollama API: {text}")
                         if self.config.debug_mode:
                             self.logger.debug(f"Response headers: {resp.headers}")
-                        return {"error": f"HTTP {resp.status}", "details": text}
-                    return await resp.json()
+                        return {"error": f"HTTP {resp.status}", "details": text}, resp.status in self.config.retry.status_forcelist
+                    if json_data and json_data.get("stream"):
+                        return await self._read_stream(resp), False
+                    return _json_loads(await resp.read()), False
+            return None, False
         except asyncio.TimeoutError:
             self.logger.error(f"Request to {endpoint} timed out after {self.config.request_timeout}s")
-            return {"error": "timeout", "details": f"Request timed out after {self.config.request_timeout}s"}
+            return {"error": "timeout", "details": f"Request timed out after {self.config.request_timeout}s"}, True
         except aiohttp.ClientError as e:
             self.logger.error(f"Client error in request to {endpoint}: {e}")
-            return {"error": "connection_error", "details": str(e)}
+            return {"error": "connection_error", "details": str(e)}, True
         except Exception as e:
             self.logger.error(f"Error in request to {endpoint}: {e}")
             traceback.print_exc()
-            return {"error": "request_failed", "details": str(e)}
+            return {"error": "request_failed", "details": str(e)}, False
+    
+    @staticmethod
+    async def _read_stream(resp: aiohttp.ClientResponse) -> Dict:
+        """
+        Assemble a streamed Ollama response from its newline-delimited JSON chunks.
+        
+        Chunks are parsed as they arrive and only their text is kept: the
+        ``response`` field for generate, ``message.content`` for chat. The final
+        chunk, which carries the statistics, is returned with the full text, in
+        the same shape as a non-streamed response.
+        """
+        parts = []
+        last: Dict[str, Any] = {}
+        async for line in resp.content:
+            line = line.strip()
+            if not line:
+                continue
+            chunk = _json_loads(line)
+            if "error" in chunk:
+                return {"error": "stream_error", "details": chunk["error"]}
+            if "message" in chunk:
+                parts.append(chunk["message"].get("content", ""))
+            else:
+                parts.append(chunk.get("response", ""))
+            last = chunk
+        
+        text = "".join(parts)
+        if "message" in last:
+            last["message"] = {**last["message"], "content": text}
+        else:
+            last["response"] = text
+        return last
     
     def _get_model_status(self, model_name: str) -> ModelStatus:
         """Get or create status tracking for a model"""
@@ -768,8 +1144,7 @@ class ModelManager:
                 return []
                 
             # Filter out incompatible models
-            exclude_terms = {"embed", "whisper", "70b", "32b+", "large"}
-            filtered_models = [m for m in models if not any(t in m.lower() for t in exclude_terms)]
+            filtered_models = [m for m in models if not _EXCLUDED_MODEL_PATTERN.search(m)]
             
             self.logger.info(f"Found {len(filtered_models)} compatible models")
             return filtered_models
@@ -875,11 +1250,59 @@ class ModelManager:
             self.logger.error(f"Error unloading model {model_name}: {e}")
             return False
     
-    def _create_cache_key(self, model_name: str, prompt: str, options: Dict) -> str:
-        """Create a cache key for a model request"""
-        # Combine model, prompt, and options into a single string
-        serialized = f"{model_name}:{prompt}:{json.dumps(options or {})}"
-        return serialized
+    async def _switch_active_model(self, model_name: str) -> bool:
+        """Make model_name the preloaded model, unloading the previous one; caller holds model_lock"""
+        if not self.config.preload_models or self.active_model == model_name:
+            return True
+        if self.active_model:
+            # Unload previous model to free resources
+            await self.unload_model(self.active_model)
+        if not await self.preload_model(model_name):
+            return False
+        self.active_model = model_name
+        return True
+    
+    @contextlib.asynccontextmanager
+    async def _model_slot(self, model_name: str):
+        """Hold model_lock for the whole call under sequential_execution, otherwise only while switching models"""
+        if self.config.sequential_execution:
+            async with self.model_lock:
+                yield await self._switch_active_model(model_name)
+            return
+        
+        loaded = True
+        if self.config.preload_models and self.active_model != model_name:
+            async with self.model_lock:
+                loaded = await self._switch_active_model(model_name)
+        yield loaded
+    
+    def _create_cache_key(
+        self,
+        model_name: str,
+        prompt: str,
+        options: Dict,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        format: Optional[Dict] = None
+    ) -> str:
+        """Create a cache key for a model request, or for a chat request when messages are given"""
+        # Hash model, prompt and options (in sorted key order) directly instead of
+        # building and serializing a combined string for every request
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(model_name.encode())
+        digest.update(b"\0")
+        digest.update(prompt.encode())
+        for key in sorted(options or {}):
+            digest.update(b"\0")
+            digest.update(key.encode())
+            digest.update(b"=")
+            digest.update(repr(options[key]).encode())
+        if messages is not None:
+            digest.update(b"\0messages=")
+            digest.update(_json_dumps(messages))
+        if format:
+            digest.update(b"\0format=")
+            digest.update(_json_dumps(format))
+        return digest.hexdigest()
 
     @retry(
         stop_after_attempt=lambda config: config.retry.max_attempts if hasattr(config, 'retry') else 3,
@@ -916,38 +1339,10 @@ class ModelManager:
             # Generate a simulated response
             await asyncio.sleep(0.5)  # Simulate a slight delay
             
-            if "economic" in prompt.lower():
-                response = {
-                    "response": f"Economic analysis simulation for: {prompt[:50]}...",
-                    "economic_impacts": {
-                        "short_term": "Increased automation and efficiency",
-                        "medium_term": "Job market transformation",
-                        "long_term": "New economic paradigms"
-                    }
-                }
-            elif "social" in prompt.lower():
-                response = {
-                    "response": f"Social analysis simulation for: {prompt[:50]}...",
-                    "social_impacts": {
-                        "education": "Personalized learning experiences",
-                        "healthcare": "Improved diagnostics and treatment",
-                        "privacy": "New challenges in data protection"
-                    }
-                }
-            elif "ethical" in prompt.lower():
-                response = {
-                    "response": f"Ethical analysis simulation for: {prompt[:50]}...",
-                    "ethical_considerations": {
-                        "autonomy": "Questions about human vs AI decision-making",
-                        "bias": "Risks of perpetuating existing biases",
-                        "responsibility": "Questions of liability for AI decisions"
-                    }
-                }
-            elif "combine" in prompt.lower() or "integrat" in prompt.lower():
-                response = {
-                    "response": f"Integrated analysis simulation for: {prompt[:50]}...",
-                    "integrated_response": "AI will transform society across economic, social, and ethical dimensions."
-                }
+            match = _SIMULATION_TOPIC_PATTERN.search(prompt)
+            if match:
+                prefix, fields = self._SIM_RESPONSES[match.lastgroup]
+                response = {"response": f"{prefix}{prompt[:50]}...", **copy.deepcopy(fields)}
             else:
                 response = {
                     "response": f"Simulated response from {model_name} to: {prompt[:50]}..."
@@ -957,20 +1352,14 @@ class ModelManager:
             await self.cache.set(cache_key, response, ttl=3600)
             return response
         
-        # Sequential processing to avoid overwhelming Ollama
-        async with self.model_lock:
+        # Sequential processing (when configured) to avoid overwhelming Ollama
+        async with self._model_slot(model_name) as model_loaded:
             # Update model status
             self._update_model_status(model_name, last_used=time.time())
             
             # Preload the model if needed and not already loaded
-            if self.config.preload_models and self.active_model != model_name:
-                if self.active_model:
-                    # Unload previous model to free resources
-                    await self.unload_model(self.active_model)
-                preload_success = await self.preload_model(model_name)
-                if not preload_success:
-                    return {"error": "model_load_failed", "response": f"Failed to load model {model_name}"}
-                self.active_model = model_name
+            if not model_loaded:
+                return {"error": "model_load_failed", "response": f"Failed to load model {model_name}"}
             
             self.logger.info(f"Generating response from {model_name}...")
             
@@ -981,11 +1370,11 @@ class ModelManager:
                     model=model_name,
                     prompt=prompt,
                     options=options_model,
-                    stream=False
+                    stream=self.config.stream_responses
                 )
                 
                 # Convert to dict for API request
-                payload = json.loads(request.model_dump_json(exclude_none=True))
+                payload = request.model_dump(mode="json", exclude_none=True)
             except ValidationError as e:
                 self.logger.error(f"Invalid request options: {e}")
                 return {
@@ -995,7 +1384,7 @@ class ModelManager:
             
             # Make the API request
             start_time = time.time()
-            result = await self._request("generate", method="POST", json_data=payload)
+            result = await self._request("generate", method="POST", json_data=payload, with_retry=True)
             execution_time = time.time() - start_time
             
             if "error" in result:
@@ -1074,26 +1463,20 @@ class ModelManager:
             return response
         
         # Create a cache key from the messages and options
-        cache_key = f"chat:{model_name}:{json.dumps(messages)}:{json.dumps(options or {})}:{json.dumps(format or {})}"
+        cache_key = self._create_cache_key(model_name, "", options or {}, messages=messages, format=format)
         cached_result = await self.cache.get(cache_key)
         if cached_result:
             self.logger.info(f"Using cached chat response for {model_name}")
             return cached_result
         
-        # Sequential processing to avoid overwhelming Ollama
-        async with self.model_lock:
+        # Sequential processing (when configured) to avoid overwhelming Ollama
+        async with self._model_slot(model_name) as model_loaded:
             # Update model status
             self._update_model_status(model_name, last_used=time.time())
             
             # Preload the model if needed and not already loaded
-            if self.config.preload_models and self.active_model != model_name:
-                if self.active_model:
-                    # Unload previous model to free resources
-                    await self.unload_model(self.active_model)
-                preload_success = await self.preload_model(model_name)
-                if not preload_success:
-                    return {"error": "model_load_failed", "message": {"content": f"Failed to load model {model_name}"}}
-                self.active_model = model_name
+            if not model_loaded:
+                return {"error": "model_load_failed", "message": {"content": f"Failed to load model {model_name}"}}
             
             self.logger.info(f"Generating chat response from {model_name}...")
             
@@ -1104,7 +1487,7 @@ class ModelManager:
                     "model": model_name,
                     "messages": messages,
                     "options": options_model,
-                    "stream": False
+                    "stream": self.config.stream_responses
                 }
                 
                 if format:
@@ -1113,7 +1496,7 @@ class ModelManager:
                 request = OllamaChatRequest(**request_data)
                 
                 # Convert to dict for API request
-                payload = json.loads(request.model_dump_json(exclude_none=True))
+                payload = request.model_dump(mode="json", exclude_none=True)
             except ValidationError as e:
                 self.logger.error(f"Invalid chat request options: {e}")
                 return {
@@ -1123,7 +1506,7 @@ class ModelManager:
             
             # Make the API request
             start_time = time.time()
-            result = await self._request("chat", method="POST", json_data=payload)
+            result = await self._request("chat", method="POST", json_data=payload, with_retry=True)
             execution_time = time.time() - start_time
             
             if "error" in result:
@@ -1150,58 +1533,25 @@ class ModelManager:
         if not candidates:
             return None
         
-        # Create a list of (model_name, score) tuples for ranking
-        ranked_candidates = []
-        
         # First check health of all candidates in parallel
         health_tasks = [self.check_model_health(model) for model in candidates]
         health_results = await asyncio.gather(*health_tasks, return_exceptions=True)
         
-        # Filter only healthy models
-        healthy_models = []
-        for i, (model, health_result) in enumerate(zip(candidates, health_results)):
-            try:
-                if health_result is True:  # Only if explicitly healthy
-                    healthy_models.append(model)
-            except Exception:
-                # Skip models where health check threw an exception
-                continue
+        # Only models explicitly reported healthy; failed health checks are skipped
+        healthy_models = {
+            model for model, health_result in zip(candidates, health_results)
+            if health_result is True
+        }
                 
         if not healthy_models:
             self.logger.warning("No healthy fallback models available")
             return None
-            
-        # Prioritize smaller, faster models for fallbacks
-        for model in healthy_models:
-            score = 0
-            
-            # Give points for smaller model indicators in the name
-            size_indicators = {
-                "tiny": 50,
-                "mini": 40,
-                "small": 30,
-                "2b": 25,
-                "7b": 20,
-                "base": 10
-            }
-            
-            for indicator, points in size_indicators.items():
-                if indicator in model.lower():
-                    score += points
-                    
-            # Store in ranked list
-            ranked_candidates.append((model, score))
-        
-        # Sort by score (highest first) and return the best option
-        ranked_candidates.sort(key=lambda x: x[1], reverse=True)
         
-        if ranked_candidates:
-            best_model = ranked_candidates[0][0]
-            self.logger.info(f"Selected fallback model: {best_model}")
-            return best_model
-                
-        # If no models were ranked, just return the first healthy one
-        return healthy_models[0] if healthy_models else None
+        # The preference order only depends on the model catalog, so it is ranked
+        # once per catalog rather than on every call
+        best_model = next(model for model in _rank_fallback_models(tuple(available_models)) if model in healthy_models)
+        self.logger.info(f"Selected fallback model: {best_model}")
+        return best_model
 
     async def get_model_status_report(self) -> Dict[str, Any]:
         """Get a report of all model statuses"""
@@ -1244,11 +1594,67 @@ class PipelineResult(BaseModel):
     total_count: int
     success_rate: str
 
+# Prompt templates asking to combine earlier analyses
+_INTEGRATION_PATTERN = re.compile(r"combine|integrat", re.IGNORECASE)
+
+@functools.lru_cache(maxsize=256)
+def _compile_prompt_template(template: str) -> Callable[[Dict[str, Any]], str]:
+    """
+    Compile a str.format template into a function that renders it.
+    
+    The template is parsed once and turned into the source of a single f-string,
+    so rendering is one BUILD_STRING instead of re-parsing the template per call.
+    Compiled templates are cached, since Celery workers build a fresh step (and
+    so look up the same template) for every task.
+    The returned function behaves like ``template.format(**data)``, including
+    attribute/index access (``{previous[response]}``), conversions and format
+    specs, and raises KeyError for missing fields. Templates using positional
+    or nested replacement fields are rendered with str.format directly.
+    """
+    try:
+        parsed = list(string.Formatter().parse(template))
+    except ValueError:
+        return lambda data: template.format(**data)
+    
+    # Keys and format specs are passed in as closure variables rather than
+    # embedded as literals, so no value ever needs escaping inside the f-string
+    constants: List[Any] = []
+    
+    def constant(value: Any) -> str:
+        constants.append(value)
+        return f"_c{len(constants) - 1}"
+    
+    body = []
+    for literal, field_name, format_spec, conversion in parsed:
+        escaped = literal.encode("unicode_escape").decode("ascii")
+        body.append(escaped.replace("'", "\\'").replace("{", "{{").replace("}", "}}"))
+        if field_name is None:
+            continue
+        
+        first, rest = _string.formatter_field_name_split(field_name)
+        if not isinstance(first, str) or not first or "{" in (format_spec or ""):
+            return lambda data: template.format(**data)
+        
+        expression = f"data[{constant(first)}]"
+        for is_attr, key in rest:
+            expression = f"getattr({expression}, {constant(key)})" if is_attr else f"{expression}[{constant(key)}]"
+        if conversion:
+            expression += f"!{conversion}"
+        if format_spec:
+            expression += f":{{{constant(format_spec)}}}"
+        body.append(f"{{{expression}}}")
+    
+    names = ", ".join(f"_c{index}" for index in range(len(constants)))
+    source = f"def _make_render({names}):\n    return lambda data: f'{''.join(body)}'\n"
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, "<prompt template>", "exec"), namespace)
+    return namespace["_make_render"](*constants)
+
 class AnalysisStep(ABC):
     """Abstract base class for analysis pipeline steps"""
     @abstractmethod
-    async def execute(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute the step with the given data"""
+    async def execute(self, data: Mapping[str, Any]) -> Dict[str, Any]:
+        """Execute the step with the given data (a read-only mapping when run by a Pipeline)"""
         pass
         
     def get_name(self) -> str:
@@ -1256,7 +1662,7 @@ class AnalysisStep(ABC):
         return self.__class__.__name__
         
     @abstractmethod
-    async def get_fallback(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def get_fallback(self, data: Mapping[str, Any]) -> Dict[str, Any]:
         """Execute fallback logic when primary execution fails"""
         pass
 
@@ -1275,6 +1681,7 @@ class ModelStep(AnalysisStep):
         self.model_manager = model_manager
         self.model_name = model_name
         self.prompt_template = prompt_template
+        self._render = _compile_prompt_template(prompt_template)
         self.options = options or {"temperature": 0.7}
         self.fallback_models = fallback_models or []
         self.output_schema = output_schema
@@ -1288,7 +1695,7 @@ class ModelStep(AnalysisStep):
     def _format_prompt(self, data: Dict[str, Any]) -> str:
         """Format prompt template with data, handling errors"""
         try:
-            return self.prompt_template.format(**data)
+            return self._render(data)
         except KeyError as e:
             logger.error(f"Error formatting prompt: missing key {e}")
             # Create a safe fallback prompt
@@ -1305,7 +1712,7 @@ class ModelStep(AnalysisStep):
             prompt = "\n\n".join(prompt_parts)
             
             # Add integration request if this seems to be an integration step
-            if "combine" in self.prompt_template.lower() or "integrat" in self.prompt_template.lower():
+            if _INTEGRATION_PATTERN.search(self.prompt_template):
                 prompt += "\n\nPlease integrate these analyses into a cohesive response."
                 
             return prompt
@@ -1451,20 +1858,24 @@ class ModelStep(AnalysisStep):
             fallback_model = await self.model_manager.get_fallback_model(self.model_name, available_models)
             fallback_candidates = [fallback_model] if fallback_model else []
         
-        for fallback_model in fallback_candidates:
-            if not fallback_model:  # Skip None values
-                continue
-                
+        # Skip None values
+        fallback_candidates = [model for model in fallback_candidates if model]
+        
+        # Probe all candidates at once, then try the healthy ones in preference order
+        health_results = await asyncio.gather(
+            *[self.model_manager.check_model_health(model) for model in fallback_candidates],
+            return_exceptions=True
+        )
+        
+        # Format prompt
+        prompt = self._format_prompt(data)
+        
+        for fallback_model, is_healthy in zip(fallback_candidates, health_results):
             logger.info(f"Trying fallback model {fallback_model}")
             
-            # Check health of fallback model
-            is_healthy = await self.model_manager.check_model_health(fallback_model)
-            if not is_healthy:
+            if isinstance(is_healthy, Exception) or not is_healthy:
                 logger.warning(f"Fallback model {fallback_model} is also unhealthy, skipping")
                 continue
-                
-            # Format prompt
-            prompt = self._format_prompt(data)
             
             # Call the fallback model
             start_time = time.time()
@@ -1652,25 +2063,29 @@ class ChatModelStep(ModelStep):
             fallback_model = await self.model_manager.get_fallback_model(self.model_name, available_models)
             fallback_candidates = [fallback_model] if fallback_model else []
         
-        for fallback_model in fallback_candidates:
-            if not fallback_model:  # Skip None values
-                continue
-                
+        # Skip None values
+        fallback_candidates = [model for model in fallback_candidates if model]
+        
+        # Probe all candidates at once, then try the healthy ones in preference order
+        health_results = await asyncio.gather(
+            *[self.model_manager.check_model_health(model) for model in fallback_candidates],
+            return_exceptions=True
+        )
+        
+        # Prepare messages
+        messages = self._prepare_messages(data)
+        
+        # Format options for schema if available
+        format_options = None
+        if self.output_schema:
+            format_options = self.output_schema.model_json_schema()
+        
+        for fallback_model, is_healthy in zip(fallback_candidates, health_results):
             logger.info(f"Trying fallback model {fallback_model}")
             
-            # Check health of fallback model
-            is_healthy = await self.model_manager.check_model_health(fallback_model)
-            if not is_healthy:
+            if isinstance(is_healthy, Exception) or not is_healthy:
                 logger.warning(f"Fallback model {fallback_model} is also unhealthy, skipping")
                 continue
-                
-            # Prepare messages
-            messages = self._prepare_messages(data)
-            
-            # Format options for schema if available
-            format_options = None
-            if self.output_schema:
-                format_options = self.output_schema.model_json_schema()
             
             # Call the fallback model
             start_time = time.time()
@@ -1726,6 +2141,30 @@ class Pipeline:
         
         # Validate steps
         self._validate_steps()
+        
+        # Dependency graph for level scheduling: how many defined dependencies
+        # each step waits on, and which steps wait on it
+        self._step_map = {}
+        self._indeg = {}
+        self._children = {}
+        for name, step, _ in self.steps:
+            self._step_map[name] = step
+            self._indeg[name] = 0
+            self._children[name] = []
+        for name, _, deps in self.steps:
+            for dep in deps:
+                if dep in self._children:
+                    self._indeg[name] += 1
+                    self._children[dep].append(name)
+        
+        # Steps depending on undefined steps can never run; resolved once here
+        # so each run only has to emit their error results
+        self._missing = {}
+        for name, _, deps in self.steps:
+            missing_deps = [dep for dep in deps if dep not in self._step_map]
+            if missing_deps:
+                self._missing[name] = missing_deps
+        self._roots = [name for name, count in self._indeg.items() if count == 0 and name not in self._missing]
     
     def _validate_steps(self) -> None:
         """Validate the pipeline configuration for circular dependencies"""
@@ -1761,112 +2200,150 @@ class Pipeline:
         for node in graph:
             dfs(node)
     
+    async def _run_step(self, name: str, step: AnalysisStep, data: Mapping[str, Any]) -> Dict[str, Any]:
+        """Execute a single step with timeout protection, converting failures into error results"""
+        self.logger.info(f"Running step: {name}")
+        try:
+            # Execute step with timeout protection
+            step_timeout = 300  # 5 minute default timeout
+            try:
+                result = await asyncio.wait_for(step.execute(data), timeout=step_timeout)
+            except asyncio.TimeoutError:
+                self.logger.error(f"Step {name} execution timed out after {step_timeout}s")
+                result = {
+                    "output": {"response": f"Execution timed out after {step_timeout}s", "error": "timeout"},
+                    "time": step_timeout,
+                    "model": getattr(step, "model_name", "unknown"),
+                    "status": "error"
+                }
+            
+            self.logger.info(f"Completed step {name} with status: {result.get('status', 'unknown')}")
+            return result
+        except Exception as e:
+            self.logger.error(f"Error executing step {name}: {e}")
+            traceback.print_exc()
+            return {
+                "output": {"response": f"Error: {str(e)}", "error": "execution_error"},
+                "time": 0,
+                "status": "error"
+            }
+    
+    @staticmethod
+    def _cancelled_result(name: str, step: AnalysisStep) -> Dict[str, Any]:
+        """Build the result for a step cancelled or skipped by fail_fast"""
+        return {
+            "output": {"response": f"Step {name} cancelled after an earlier failure", "error": "cancelled"},
+            "time": 0,
+            "status": "cancelled",
+            "model": getattr(step, "model_name", "unknown")
+        }
+    
+    async def _run_level_fail_fast(self, level: List[str], data: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Execute a level's steps concurrently, cancelling the rest as soon as one fails.
+        
+        Returns:
+            List[Dict[str, Any]]: One result per step in ``level``; cancelled steps
+            get a "cancelled" result
+        """
+        tasks = {
+            asyncio.ensure_future(self._run_step(name, self._step_map[name], data)): name
+            for name in level
+        }
+        finished = {}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    finished[tasks[task]] = task.result()
+                if any(finished[tasks[task]].get("status") != "success" for task in done):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        return [
+            finished[name] if name in finished else self._cancelled_result(name, self._step_map[name])
+            for name in level
+        ]
+    
     async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Run the pipeline with the given input data"""
-        results = {}
-        data = input_data.copy()
+        """
+        Run the pipeline with the given input data.
         
-        start_time = time.time()
+        Steps are scheduled in dependency levels (Kahn's algorithm): all steps
+        whose dependencies have completed run concurrently, so the run takes
+        the sum of the slowest step per level rather than of every step. With
+        ``config.fail_fast`` the first failed step cancels the rest of its
+        level and every step not yet run; a step with missing dependencies
+        only cancels the steps that depend on it.
         
-        # Create execution plan based on dependencies
-        execution_plan = []
-        remaining_steps = {name: deps for name, _, deps in self.steps}
-        
-        # Keep adding steps until we've processed all or can't proceed
-        while remaining_steps:
-            # Find steps that have all dependencies satisfied
-            ready_steps = [
-                name for name, deps in remaining_steps.items() 
-                if all(dep in results for dep in deps)
-            ]
-            
-            if not ready_steps:
-                # If no steps are ready but we have remaining steps, we have a problem
-                missing_deps = {}
-                for name, deps in remaining_steps.items():
-                    unsatisfied = [dep for dep in deps if dep not in results]
-                    if unsatisfied:
-                        missing_deps[name] = unsatisfied
-                
-                self.logger.error(f"Cannot proceed with pipeline execution. Missing dependencies: {missing_deps}")
-                break
-            
-            # Add ready steps to the execution plan
-            execution_plan.extend(ready_steps)
-            
-            # Remove processed steps
-            for name in ready_steps:
-                del remaining_steps[name]
+        Steps receive a read-only mapping of the input plus every completed
+        step's output; use ``dict(data)`` for a mutable, JSON-serializable copy.
+        """
+        results = {}
+        start_time = time.time()
         
-        self.logger.info(f"Pipeline execution plan: {' -> '.join(execution_plan)}")
+        # Every completed step's output, layered over the input for each level
+        # so the input itself is never copied
+        step_outputs = {}
+        indeg = self._indeg.copy()
         
-        # Execute steps according to the plan
-        for step_name in execution_plan:
-            # Find the step
-            step_info = next((s for s in self.steps if s[0] == step_name), None)
-            if not step_info:
-                self.logger.error(f"Step {step_name} not found in pipeline")
-                continue
-                
-            name, step, dependencies = step_info
-            self.logger.info(f"Running step: {name}")
+        for name, missing_deps in self._missing.items():
+            self.logger.error(f"Step {name} missing dependencies: {missing_deps}")
+            results[name] = {
+                "output": {"response": f"Missing dependencies: {missing_deps}", "error": "missing_dependencies"},
+                "time": 0,
+                "status": "error",
+                "model": getattr(self._step_map[name], "model_name", "unknown")
+            }
+            step_outputs[name] = results[name]["output"]
+        
+        ready = list(self._roots)
+        # Under fail_fast, steps downstream of a missing dependency are never
+        # released and end up cancelled, while the rest of the graph still runs
+        completed = [] if self.config.fail_fast else list(self._missing)
+        aborted = False
+        
+        while not aborted:
+            # Release the steps waiting on what just completed
+            for name in completed:
+                for child in self._children[name]:
+                    indeg[child] -= 1
+                    if indeg[child] == 0 and child not in results:
+                        ready.append(child)
+            
+            if not ready:
+                break
             
-            # Check dependencies (should be satisfied due to execution plan)
-            missing_deps = [dep for dep in dependencies if dep not in results]
-            if missing_deps:
-                self.logger.error(f"Step {name} missing dependencies: {missing_deps}")
-                results[name] = {
-                    "output": {"response": f"Missing dependencies: {missing_deps}", "error": "missing_dependencies"},
-                    "time": 0,
-                    "status": "error",
-                    "model": getattr(step, "model_name", "unknown")
-                }
-                continue
+            level, ready = ready, []
+            self.logger.info(f"Running pipeline level: {', '.join(level)}")
+            # One read-only view per level, so no step can change what its
+            # siblings or the caller see; only the outputs so far are snapshotted
+            level_data = MappingProxyType(ChainMap(step_outputs.copy(), input_data))
+            if self.config.fail_fast:
+                level_results = await self._run_level_fail_fast(level, level_data)
+            else:
+                level_results = await asyncio.gather(*[
+                    self._run_step(name, self._step_map[name], level_data) for name in level
+                ])
             
-            # Execute the step with proper error handling
-            try:
-                # Create a robust version of the data
-                robust_data = input_data.copy()
-                
-                # Add results from previous steps
-                for prev_name, prev_result in results.items():
-                    prev_output = prev_result.get("output", {})
-                    if not isinstance(prev_output, dict):
-                        prev_output = {"response": str(prev_output)}
-                    robust_data[prev_name] = prev_output
-                
-                # Execute step with timeout protection
-                step_timeout = 300  # 5 minute default timeout
-                try:
-                    task = asyncio.create_task(step.execute(robust_data))
-                    result = await asyncio.wait_for(task, timeout=step_timeout)
-                except asyncio.TimeoutError:
-                    self.logger.error(f"Step {name} execution timed out after {step_timeout}s")
-                    result = {
-                        "output": {"response": f"Execution timed out after {step_timeout}s", "error": "timeout"},
-                        "time": step_timeout,
-                        "model": getattr(step, "model_name", "unknown"),
-                        "status": "error"
-                    }
-                
+            for name, result in zip(level, level_results):
                 results[name] = result
-                
-                # Update data with successful results
-                if result.get("status") == "success":
-                    data[name] = result["output"]
-                else:
-                    # Add placeholder for failed steps
-                    data[name] = {"response": f"Step {name} failed", "error": "step_failed"}
-                
-                self.logger.info(f"Completed step {name} with status: {result.get('status', 'unknown')}")
-            except Exception as e:
-                self.logger.error(f"Error executing step {name}: {e}")
-                traceback.print_exc()
-                results[name] = {
-                    "output": {"response": f"Error: {str(e)}", "error": "execution_error"},
-                    "time": 0,
-                    "status": "error"
-                }
+                output = result.get("output", {})
+                if not isinstance(output, dict):
+                    output = {"response": str(output)}
+                step_outputs[name] = output
+            completed = level
+            aborted = self.config.fail_fast and any(result.get("status") != "success" for result in level_results)
+        
+        # Steps left unrun because a failure aborted the run
+        for name, step in self._step_map.items():
+            if name not in results:
+                results[name] = self._cancelled_result(name, step)
         
         # Count successful steps and total execution time
         success_count = sum(1 for r in results.values() if r.get("status") == "success")
@@ -12,21 +12,35 @@ This extension module provides distributed processing capabilities for PASTURE:
 - Distributed pipeline execution across multiple workers
 """
 
+from __future__ import annotations
+
 import asyncio
+import atexit
+import functools
+import hashlib
 import importlib.util
 import json
 import logging
 import os
 import sys
+import threading
 import time
-import traceback
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from typing import Any, Dict, List, Optional, Tuple, Union, Callable
 
 from . import Config, FileCache, ModelManager, AnalysisStep, Pipeline
+from .pasture import _INTEGRATION_PATTERN, _compile_prompt_template
 
 # Check if Celery is installed
 celery_installed = importlib.util.find_spec("celery") is not None
 redis_installed = importlib.util.find_spec("redis") is not None
+# orjson is optional; it speeds up JSON (de)serialization of Celery messages
+orjson_installed = importlib.util.find_spec("orjson") is not None
+# uvloop is optional; it gives worker processes a faster event loop
+uvloop_installed = importlib.util.find_spec("uvloop") is not None
+# msgpack is optional; it gives a more compact encoding for task results
+msgpack_installed = importlib.util.find_spec("msgpack") is not None
 
 if not celery_installed or not redis_installed:
     logging.warning(
@@ -41,21 +55,61 @@ logger = logging.getLogger(__name__)
 if celery_installed and redis_installed:
     import celery
     from celery import Celery
-    from celery.result import AsyncResult
+    from celery.result import AsyncResult, ResultSet
+    from celery.signals import worker_process_init, worker_process_shutdown
+    from kombu import Exchange, Queue
+    from kombu.serialization import register as register_serializer
+    
+    if orjson_installed:
+        import orjson
+        
+        def _orjson_dumps(obj: Any) -> str:
+            """Serialize a Celery message body with orjson"""
+            return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        
+        # Same content type as 'json', so messages stay readable by any JSON consumer
+        register_serializer(
+            'ojson',
+            _orjson_dumps,
+            orjson.loads,
+            content_type='application/json',
+            content_encoding='utf-8'
+        )
+        JSON_SERIALIZER = 'ojson'
+    else:
+        JSON_SERIALIZER = 'json'
+    
+    # Model responses are the bulk of what goes through the result backend
+    RESULT_SERIALIZER = 'msgpack' if msgpack_installed else JSON_SERIALIZER
+    
+    if uvloop_installed:
+        import uvloop
     
     ###########################################
     ## CELERY APPLICATION                   ##
     ###########################################
     
+    # Queue for model inference tasks (run with a small GPU-bound worker pool)
+    GPU_QUEUE = 'gpu_models'
+    # Queue for lightweight orchestration tasks (run with a wide CPU worker pool)
+    CPU_QUEUE = 'cpu_light'
+    
+    # Guards creation of the PastureTaskApp singleton
+    _instance_lock = threading.Lock()
+    
     class PastureTaskApp:
         """Singleton for the Celery application used by PASTURE tasks"""
         _instance = None
         _app = None
         
         def __new__(cls, broker_url=None, backend_url=None):
+            # Double-checked locking: the lock is only taken until the app exists
             if cls._instance is None:
-                cls._instance = super(PastureTaskApp, cls).__new__(cls)
-                cls._instance._init_app(broker_url, backend_url)
+                with _instance_lock:
+                    if cls._instance is None:
+                        instance = super(PastureTaskApp, cls).__new__(cls)
+                        instance._init_app(broker_url, backend_url)
+                        cls._instance = instance
             return cls._instance
         
         def _init_app(self, broker_url=None, backend_url=None):
@@ -70,13 +124,48 @@ if celery_installed and redis_installed:
             )
             
             self._app.conf.update(
-                task_serializer='json',
-                accept_content=['json'],
-                result_serializer='json',
+                task_serializer=JSON_SERIALIZER,
+                accept_content=[JSON_SERIALIZER, 'json'],
+                result_serializer=RESULT_SERIALIZER,
+                result_accept_content=[RESULT_SERIALIZER, JSON_SERIALIZER, 'json'],
+                # Compress messages and results, and drop results nobody collected after 5 minutes
+                task_compression='gzip',
+                result_compression='gzip',
+                result_expires=300,
+                # Never cache results client-side; a stale cached state can make a later
+                # get() on the same task id wait for its full timeout. Note that 0 would
+                # mean an unbounded cache, not a disabled one
+                result_cache_max=-1,
                 timezone='UTC',
                 enable_utc=True,
                 task_track_started=True,
-                worker_send_task_events=True
+                worker_send_task_events=True,
+                # Share a bounded pool of broker/backend connections between submissions
+                broker_pool_limit=int(os.environ.get('BROKER_POOL_LIMIT', 64)),
+                broker_transport_options={
+                    'socket_keepalive': True,
+                    'health_check_interval': 30
+                },
+                redis_max_connections=int(os.environ.get('REDIS_MAX_CONNECTIONS', 128)),
+                redis_socket_keepalive=True,
+                result_backend_transport_options={'retry_on_timeout': True},
+                # Results are awaited from executor threads, so share the backend between them
+                result_backend_thread_safe=True,
+                task_acks_late=False,
+                # Model tasks run for seconds to minutes, so only hand a task to a free worker
+                # process rather than letting one prefetch several
+                worker_prefetch_multiplier=1,
+                # Keep GPU-bound inference and cheap orchestration work on separate queues
+                task_queues=(
+                    Queue(GPU_QUEUE, Exchange(GPU_QUEUE), routing_key=GPU_QUEUE),
+                    Queue(CPU_QUEUE, Exchange(CPU_QUEUE), routing_key=CPU_QUEUE)
+                ),
+                task_default_queue=CPU_QUEUE,
+                task_routes={
+                    'pasture.process_model': {'queue': GPU_QUEUE},
+                    'pasture.process_model_batch': {'queue': GPU_QUEUE},
+                    'pasture.run_pipeline_step': {'queue': CPU_QUEUE}
+                }
             )
             
             # Register basic tasks
@@ -95,11 +184,163 @@ if celery_installed and redis_installed:
     # Create default Celery app
     celery_app = PastureTaskApp().app
     
+    def _dump_config(config: Any) -> Dict[str, Any]:
+        """Serialize a Config (or any plain object) into the dict sent along with tasks"""
+        return config.model_dump() if hasattr(config, 'model_dump') else config.__dict__
+    
+    # Threads reserved for blocking waits on Celery results. Each wait can hold
+    # a thread for up to a task timeout, so they get their own pool instead of
+    # starving the default executor used for file cache I/O
+    _celery_wait_executor = ThreadPoolExecutor(
+        max_workers=int(os.environ.get('CELERY_WAIT_THREADS', 64)),
+        thread_name_prefix='pasture-celery-wait'
+    )
+    atexit.register(_celery_wait_executor.shutdown, wait=False)
+    
+    def _get_and_forget(task: AsyncResult, timeout: float) -> Any:
+        """Block for a task's result, then delete it from the result backend"""
+        result = task.get(timeout=timeout)
+        task.forget()
+        return result
+    
+    async def _wait_for_task(task: AsyncResult, timeout: float) -> Any:
+        """
+        Wait for a Celery task result without blocking the event loop.
+        
+        AsyncResult.get is a blocking call, so it is run in the dedicated wait
+        executor to let other coroutines (sibling pipeline steps, fallbacks) make progress.
+        
+        If the wait times out or is cancelled, the task is revoked so a worker
+        does not spend time on a result nobody will read. A collected result is
+        removed from the backend straight away.
+        
+        Raises:
+            celery.exceptions.TimeoutError: If the task does not finish in time
+        """
+        loop = asyncio.get_event_loop()
+        try:
+            return await loop.run_in_executor(_celery_wait_executor, _get_and_forget, task, timeout)
+        except (celery.exceptions.TimeoutError, asyncio.CancelledError):
+            # The app sets result_cache_max=-1, so there is no client-side result
+            # cache to clear before a retry polls the backend again
+            task.revoke()
+            raise
+    
+    # How long a worker availability check is trusted, in seconds
+    WORKER_CHECK_TTL = 30.0
+    
+    # Result of the last worker availability check
+    _worker_status = {"checked_at": 0.0, "available": False}
+    
+    async def _workers_available() -> bool:
+        """Check whether any Celery worker responds, caching the answer for WORKER_CHECK_TTL"""
+        now = time.time()
+        if now - _worker_status["checked_at"] < WORKER_CHECK_TTL:
+            return _worker_status["available"]
+        
+        loop = asyncio.get_event_loop()
+        try:
+            replies = await loop.run_in_executor(
+                _celery_wait_executor, functools.partial(celery_app.control.ping, timeout=0.5)
+            )
+        except Exception as e:
+            logger.warning(f"Could not reach Celery workers: {e}")
+            replies = []
+        
+        _worker_status["checked_at"] = time.time()
+        _worker_status["available"] = bool(replies)
+        return _worker_status["available"]
+    
+    ###########################################
+    ## WORKER STATE                         ##
+    ###########################################
+    
+    # ModelManager instances reused across tasks in a worker process, keyed by config fingerprint
+    _WORKER_STATE: Dict[str, ModelManager] = {}
+    
+    def _config_key(config_dict: Optional[Dict] = None) -> str:
+        """Create a stable fingerprint for a configuration dictionary"""
+        serialized = json.dumps(config_dict or {}, sort_keys=True, default=str)
+        return hashlib.md5(serialized.encode('utf-8')).hexdigest()
+    
+    def _get_worker_model_manager(config_dict: Optional[Dict] = None) -> ModelManager:
+        """Get the ModelManager for a configuration, creating it on first use in this process"""
+        key = _config_key(config_dict)
+        model_manager = _WORKER_STATE.get(key)
+        if model_manager is None:
+            config = Config(**(config_dict or {}))
+            cache = FileCache(config.cache.dir, max_entries=config.cache.max_entries)
+            model_manager = _WORKER_STATE.setdefault(key, ModelManager(config, cache))
+        return model_manager
+    
+    # Event loop shared by all tasks in this worker process, run on a background thread
+    _worker_loop: Optional[asyncio.AbstractEventLoop] = None
+    _worker_loop_lock = threading.Lock()
+    
+    def _get_worker_loop() -> asyncio.AbstractEventLoop:
+        """Get this process's task event loop, starting it on first use"""
+        global _worker_loop
+        if _worker_loop is None:
+            with _worker_loop_lock:
+                if _worker_loop is None:
+                    loop = uvloop.new_event_loop() if uvloop_installed else asyncio.new_event_loop()
+                    threading.Thread(
+                        target=loop.run_forever,
+                        name="pasture-worker-loop",
+                        daemon=True
+                    ).start()
+                    _worker_loop = loop
+        return _worker_loop
+    
+    def _run_task_coroutine(coro, timeout: Optional[float] = None) -> Any:
+        """
+        Run a task's coroutine on the worker event loop and wait for its result.
+        
+        Keeping one loop per process lets the cached ModelManagers keep their HTTP
+        sessions open across tasks, instead of building a loop and a session per task.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, _get_worker_loop())
+        try:
+            return future.result(timeout=timeout)
+        except BaseException:
+            future.cancel()
+            raise
+    
+    @worker_process_init.connect
+    def _init_worker_state(**kwargs):
+        """
+        Start the event loop when a worker process starts.
+        
+        ModelManagers are built lazily on the worker loop by the first task for
+        each config, since pipeline tasks send their own config and a manager for
+        the empty default config would rarely be used.
+        """
+        _get_worker_loop()
+    
+    @worker_process_shutdown.connect
+    def _shutdown_worker_state(**kwargs):
+        """Close all cached ModelManagers and stop the event loop when a worker process exits"""
+        global _worker_loop
+        loop, _worker_loop = _worker_loop, None
+        if loop is None:
+            _WORKER_STATE.clear()
+            return
+        for model_manager in _WORKER_STATE.values():
+            try:
+                asyncio.run_coroutine_threadsafe(model_manager.close(), loop).result(timeout=10)
+            except Exception as e:
+                logger.error(f"Error closing model manager: {e}")
+        _WORKER_STATE.clear()
+        loop.call_soon_threadsafe(loop.stop)
+    
+    # Solo and thread pools don't send worker_process_shutdown
+    atexit.register(_shutdown_worker_state)
+    
     ###########################################
     ## CELERY TASKS                         ##
     ###########################################
     
-    @celery_app.task(bind=True, name='pasture.process_model')
+    @celery_app.task(bind=True, name='pasture.process_model', acks_late=True)
     def process_model(self, model_name, prompt, options=None, config_dict=None):
         """
         Process a model request as a Celery task.
@@ -113,15 +354,13 @@ if celery_installed and redis_installed:
         Returns:
             Dict: Model output and metadata
         """
-        # Need to use asyncio.run because Celery tasks are synchronous
-        # but our PASTURE code is asynchronous
+        # Celery tasks are synchronous but our PASTURE code is asynchronous
         try:
-            return asyncio.run(_process_model_async(
+            return _run_task_coroutine(_process_model_async(
                 model_name, prompt, options, config_dict
-            ))
+            ), timeout=self.soft_time_limit or self.app.conf.task_soft_time_limit)
         except Exception as e:
-            logger.error(f"Error in Celery task: {e}")
-            traceback.print_exc()
+            logger.exception("Error in Celery task: %s", e)
             return {
                 "error": "celery_task_error",
                 "response": f"Error in Celery task: {str(e)}",
@@ -137,31 +376,206 @@ if celery_installed and redis_installed:
         """Async implementation for the process_model Celery task"""
         start_time = time.time()
         
-        # Create config from dict or use defaults
-        config = Config(**(config_dict or {}))
+        # Reuse this process's model manager for the configuration
+        model_manager = _get_worker_model_manager(config_dict)
         
-        # Initialize cache and model manager
-        cache = FileCache(config.cache_dir)
-        model_manager = ModelManager(config, cache)
+        # Generate response from model
+        result = await model_manager.generate_with_model(
+            model_name=model_name,
+            prompt=prompt,
+            options=options
+        )
         
-        try:
-            # Generate response from model
-            result = await model_manager.generate_with_model(
-                model_name=model_name,
-                prompt=prompt,
-                options=options
-            )
+        execution_time = time.time() - start_time
+        
+        # Add execution metadata
+        if "execution_time" not in result:
+            result["execution_time"] = execution_time
             
-            execution_time = time.time() - start_time
+        return result
+    
+    @celery_app.task(bind=True, name='pasture.process_model_batch', acks_late=True)
+    def process_model_batch(self, model_name, requests, config_dict=None):
+        """
+        Process a batch of model requests for the same model as one Celery task.
+        
+        Args:
+            model_name: Name of the model to use
+            requests: List of (prompt, options) pairs
+            config_dict: Configuration dictionary
+            
+        Returns:
+            List[Dict]: Model outputs, in the same order as requests
+        """
+        try:
+            return _run_task_coroutine(_process_model_batch_async(
+                model_name, requests, config_dict
+            ), timeout=self.soft_time_limit or self.app.conf.task_soft_time_limit)
+        except Exception as e:
+            logger.exception("Error in Celery batch task: %s", e)
+            return [
+                {
+                    "error": "celery_task_error",
+                    "response": f"Error in Celery task: {str(e)}",
+                    "execution_time": 0
+                }
+                for _ in requests
+            ]
+    
+    async def _process_model_batch_async(
+        model_name: str,
+        requests: List[Tuple[str, Optional[Dict]]],
+        config_dict: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Async implementation for the process_model_batch Celery task"""
+        # Reuse this process's model manager for the configuration
+        model_manager = _get_worker_model_manager(config_dict)
+        
+        async def generate(prompt: str, options: Optional[Dict]) -> Dict:
+            start_time = time.time()
+            try:
+                result = await model_manager.generate_with_model(
+                    model_name=model_name,
+                    prompt=prompt,
+                    options=options
+                )
+            except Exception as e:
+                logger.error(f"Error in batched request for {model_name}: {e}")
+                return {
+                    "error": "celery_task_error",
+                    "response": f"Error in Celery task: {str(e)}",
+                    "execution_time": time.time() - start_time
+                }
             
             # Add execution metadata
             if "execution_time" not in result:
-                result["execution_time"] = execution_time
-                
+                result["execution_time"] = time.time() - start_time
             return result
-        finally:
-            # Clean up resources
-            await model_manager.close()
+        
+        # Overlap cache lookups for the whole batch, and HTTP requests too
+        # unless the config asks for sequential execution
+        return list(await asyncio.gather(*[
+            generate(prompt, options) for prompt, options in requests
+        ]))
+    
+    class _ModelRequestBatcher:
+        """
+        Coalesces concurrent model requests into process_model_batch tasks.
+        
+        Requests for the same model, options, configuration and queue that arrive
+        within the batch window are submitted as a single Celery task; each caller
+        receives its own result. If every caller of a batch is cancelled, the
+        batch is dropped, or its task revoked if it was already submitted.
+        """
+        
+        def __init__(self) -> None:
+            self._pending: Dict[Tuple, List[Tuple[str, asyncio.Future]]] = {}
+            # Flush tasks in flight, mapped to their batch. The event loop only holds
+            # tasks weakly, so without these references a pending flush could be
+            # garbage-collected and its callers never answered
+            self._tasks: Dict[asyncio.Task, List[Tuple[str, asyncio.Future]]] = {}
+        
+        async def submit(
+            self,
+            model_name: str,
+            prompt: str,
+            options: Optional[Dict],
+            config_payload: Dict,
+            config_key: str,
+            queue: Optional[str],
+            timeout: float,
+            batch_window_ms: float,
+            max_batch_size: int
+        ) -> Dict:
+            """
+            Queue a request and wait for its result from the batched task.
+            
+            config_key is the caller's memoized fingerprint of config_payload, so
+            the configuration is not re-serialized for every request.
+            """
+            loop = asyncio.get_event_loop()
+            key = (
+                id(loop),
+                model_name,
+                json.dumps(options or {}, sort_keys=True, default=str),
+                config_key,
+                queue
+            )
+            future = loop.create_future()
+            
+            batch = self._pending.setdefault(key, [])
+            batch.append((prompt, future))
+            future.add_done_callback(functools.partial(self._waiter_done, key, batch))
+            
+            if len(batch) >= max_batch_size:
+                # Batch is full, stop its window timer and submit it right away
+                del self._pending[key]
+                self._cancel_tasks(batch)
+                self._start_flush(loop, batch, self._flush(batch, model_name, options, config_payload, queue, timeout))
+            elif len(batch) == 1:
+                # First request opens the batch window
+                self._start_flush(loop, batch, self._flush_after(
+                    key, batch, batch_window_ms / 1000.0,
+                    model_name, options, config_payload, queue, timeout
+                ))
+            
+            return await future
+        
+        def _start_flush(self, loop: asyncio.AbstractEventLoop, batch: List, coro) -> None:
+            """Run a batch's flush as a task, keeping a reference until it finishes"""
+            task = loop.create_task(coro)
+            self._tasks[task] = batch
+            task.add_done_callback(self._flush_done)
+        
+        def _flush_done(self, task: asyncio.Task) -> None:
+            """Drop the reference to a finished flush task and report unexpected errors"""
+            del self._tasks[task]
+            if not task.cancelled() and task.exception() is not None:
+                logger.error(f"Error flushing model request batch: {task.exception()}")
+        
+        def _waiter_done(self, key: Tuple, batch: List, future: asyncio.Future) -> None:
+            """Stop a batch's work once every caller waiting on it has been cancelled"""
+            if not future.cancelled() or not all(waiter.cancelled() for _, waiter in batch):
+                return
+            if self._pending.get(key) is batch:
+                del self._pending[key]
+            # Cancelling a flush that is waiting revokes the submitted Celery task
+            self._cancel_tasks(batch)
+        
+        def _cancel_tasks(self, batch: List) -> None:
+            """Cancel the window timer or flush tasks of a batch"""
+            for task, task_batch in list(self._tasks.items()):
+                if task_batch is batch:
+                    task.cancel()
+        
+        async def _flush_after(self, key, batch, delay, model_name, options, config_payload, queue, timeout) -> None:
+            """Submit a batch once its window closes, unless it was already submitted"""
+            await asyncio.sleep(delay)
+            if self._pending.get(key) is batch:
+                del self._pending[key]
+                await self._flush(batch, model_name, options, config_payload, queue, timeout)
+        
+        async def _flush(self, batch, model_name, options, config_payload, queue, timeout) -> None:
+            """Submit a batch as one Celery task and distribute the results"""
+            try:
+                task: AsyncResult = process_model_batch.apply_async(
+                    args=(model_name, [(prompt, options) for prompt, _ in batch], config_payload),
+                    queue=queue,
+                    expires=timeout * 2
+                )
+                results = await _wait_for_task(task, timeout)
+                if len(results) != len(batch):
+                    raise ValueError(f"Batch task returned {len(results)} results for {len(batch)} requests")
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+    
+    # Shared batcher for all Celery model steps in this process
+    _model_batcher = _ModelRequestBatcher()
     
     @celery_app.task(bind=True, name='pasture.run_pipeline_step')
     def run_pipeline_step(self, step_name, step_config, data, config_dict=None):
@@ -177,9 +591,9 @@ if celery_installed and redis_installed:
         Returns:
             Dict: Step output and metadata
         """
-        return asyncio.run(_run_pipeline_step_async(
+        return _run_task_coroutine(_run_pipeline_step_async(
             step_name, step_config, data, config_dict
-        ))
+        ), timeout=self.soft_time_limit or self.app.conf.task_soft_time_limit)
     
     async def _run_pipeline_step_async(
         step_name: str,
@@ -190,39 +604,37 @@ if celery_installed and redis_installed:
         """Async implementation for the run_pipeline_step Celery task"""
         start_time = time.time()
         
-        # Create config from dict or use defaults
-        config = Config(**(config_dict or {}))
+        # Reuse this process's model manager for the configuration
+        model_manager = _get_worker_model_manager(config_dict)
         
-        # Initialize cache and model manager
-        cache = FileCache(config.cache_dir)
-        model_manager = ModelManager(config, cache)
+        # Create and execute the step
+        step = CeleryModelStep(
+            model_manager=model_manager,
+            model_name=step_config.get("model_name"),
+            prompt_template=step_config.get("prompt_template"),
+            options=step_config.get("options", {"temperature": 0.7}),
+            fallback_models=step_config.get("fallback_models", []),
+            use_patching=step_config.get("use_patching"),
+            max_patching_attempts=step_config.get("max_patching_attempts"),
+            patching_prompt=step_config.get("patching_prompt"),
+            queue=step_config.get("queue"),
+            max_parallel_fallbacks=step_config.get("max_parallel_fallbacks", 3)
+        )
+        if config_dict is not None:
+            # The step's model tasks can reuse the config this task was sent with
+            step._payload_config = model_manager.config
+            step._payload_cache = config_dict
         
-        try:
-            # Create and execute the step
-            step = CeleryModelStep(
-                model_manager=model_manager,
-                model_name=step_config.get("model_name"),
-                prompt_template=step_config.get("prompt_template"),
-                options=step_config.get("options", {"temperature": 0.7}),
-                fallback_models=step_config.get("fallback_models", []),
-                use_patching=step_config.get("use_patching"),
-                max_patching_attempts=step_config.get("max_patching_attempts"),
-                patching_prompt=step_config.get("patching_prompt")
-            )
-            
-            result = await step.execute(data)
-            
-            execution_time = time.time() - start_time
+        result = await step.execute(data)
+        
+        execution_time = time.time() - start_time
+        
+        # Add total execution time (including Celery overhead)
+        result["total_time"] = execution_time
+        if "time" in result:
+            result["queue_time"] = execution_time - result["time"]
             
-            # Add total execution time (including Celery overhead)
-            result["total_time"] = execution_time
-            if "time" in result:
-                result["queue_time"] = execution_time - result["time"]
-                
-            return result
-        finally:
-            # Clean up resources
-            await model_manager.close()
+        return result
     
     ###########################################
     ## DISTRIBUTED PIPELINE COMPONENTS      ##
@@ -240,23 +652,49 @@ if celery_installed and redis_installed:
                     task_timeout: int = 180,
                     use_patching: Optional[bool] = None,
                     max_patching_attempts: Optional[int] = None,
-                    patching_prompt: Optional[str] = None):
+                    patching_prompt: Optional[str] = None,
+                    queue: Optional[str] = None,
+                    max_parallel_fallbacks: int = 3):
             self.model_manager = model_manager
             self.model_name = model_name
             self.prompt_template = prompt_template
             self.options = options or {"temperature": 0.7}
             self.fallback_models = fallback_models or []
             self.task_timeout = task_timeout
+            self.queue = queue  # None routes model tasks to GPU_QUEUE
+            self.max_parallel_fallbacks = max(1, max_parallel_fallbacks)
+            self._render_prompt = _compile_prompt_template(prompt_template)
+            # Serialized config sent with each task, rebuilt only if the config object is replaced
+            self._payload_config: Any = None
+            self._payload_cache: Optional[Dict[str, Any]] = None
+            self._payload_key_for: Optional[Dict[str, Any]] = None
+            self._payload_key: Optional[str] = None
             
             # JSON patching configuration
             self.use_patching = use_patching if use_patching is not None else model_manager.config.json_patching.enabled
             self.max_patching_attempts = max_patching_attempts or model_manager.config.json_patching.max_attempts
             self.patching_prompt = patching_prompt or model_manager.config.json_patching.patching_prompt
         
+        def _config_payload(self) -> Dict[str, Any]:
+            """Get the serialized model manager config sent along with each task"""
+            config = self.model_manager.config
+            if self._payload_config is not config:
+                self._payload_cache = _dump_config(config)
+                self._payload_config = config
+            return self._payload_cache
+        
+        def _config_fingerprint(self) -> str:
+            """Get the fingerprint of the config payload that groups batched requests"""
+            payload = self._config_payload()
+            if self._payload_key_for is not payload:
+                self._payload_key = _config_key(payload)
+                self._payload_key_for = payload
+            return self._payload_key
+        
         def _format_prompt(self, data: Dict[str, Any]) -> str:
             """Format prompt template with data, handling errors"""
             try:
-                return self.prompt_template.format(**data)
+                return self._render_prompt(data)
             except KeyError as e:
                 logger.error(f"Error formatting prompt: missing key {e}")
                 # Create a safe fallback prompt
@@ -273,7 +711,7 @@ if celery_installed and redis_installed:
                 prompt = "\n\n".join(prompt_parts)
                 
                 # Add integration request if this seems to be an integration step
-                if "combine" in self.prompt_template.lower() or "integrat" in self.prompt_template.lower():
+                if _INTEGRATION_PATTERN.search(self.prompt_template):
                     prompt += "\n\nPlease integrate these analyses into a cohesive response."
                     
                 return prompt
@@ -294,17 +732,42 @@ if celery_installed and redis_installed:
                 
                 logger.info(f"Submitting Celery task for model {self.model_name}")
                 
-                # Submit task to Celery
-                task: AsyncResult = process_model.delay(
-                    self.model_name,
-                    prompt,
-                    self.options,
-                    self.model_manager.config.__dict__ if not hasattr(self.model_manager.config, 'model_dump') else self.model_manager.config.model_dump()
-                )
+                config_payload = self._config_payload()
+                distributed = self.model_manager.config.distributed
                 
-                # Wait for the task to complete with timeout
+                # Submit task to Celery and wait for it to complete with timeout
                 try:
-                    result = task.get(timeout=self.task_timeout)
+                    if distributed.inline and not await _workers_available():
+                        # Nobody would pick the task up, so skip the broker round-trip
+                        logger.info(f"No Celery workers available, running {self.model_name} in-process")
+                        result = await self.model_manager.generate_with_model(
+                            self.model_name, prompt, self.options
+                        )
+                    elif distributed.max_batch_size > 1:
+                        # Coalesce with concurrent requests for the same model
+                        result = await _model_batcher.submit(
+                            self.model_name,
+                            prompt,
+                            self.options,
+                            config_payload,
+                            self._config_fingerprint(),
+                            self.queue,
+                            self.task_timeout,
+                            distributed.batch_window_ms,
+                            distributed.max_batch_size
+                        )
+                    else:
+                        task: AsyncResult = process_model.apply_async(
+                            args=(
+                                self.model_name,
+                                prompt,
+                                self.options,
+                                config_payload
+                            ),
+                            queue=self.queue,
+                            expires=self.task_timeout * 2
+                        )
+                        result = await _wait_for_task(task, self.task_timeout)
                 except celery.exceptions.TimeoutError:
                     logger.error(f"Celery task timed out after {self.task_timeout}s")
                     if self.fallback_models:
@@ -343,8 +806,7 @@ if celery_installed and redis_installed:
                 }
             
             except Exception as e:
-                logger.error(f"Error in {self.model_name} step: {e}")
-                traceback.print_exc()
+                logger.exception("Error in %s step: %s", self.model_name, e)
                 
                 if self.fallback_models:
                     logger.info(f"Trying fallback models after exception in {self.model_name}")
@@ -358,49 +820,118 @@ if celery_installed and redis_installed:
                     "error_details": str(e)
                 }
         
+        async def _first_fallback_result(
+            self,
+            prompt: str,
+            config_payload: Dict[str, Any]
+        ) -> Optional[Tuple[str, Dict[str, Any]]]:
+            """
+            Run the prompt on all healthy fallback models concurrently.
+            
+            At most max_parallel_fallbacks tasks are in flight at once. The first
+            result without an error wins and the remaining attempts are cancelled,
+            which revokes their Celery tasks.
+            
+            Returns:
+                Optional[Tuple[str, Dict]]: The winning model and its result, or None if all failed
+            """
+            # Check health of all fallback models in parallel; the probes go through the
+            # model manager's own session, so they share its keep-alive connection pool
+            check_health = self.model_manager.check_model_health
+            health_results = await asyncio.gather(
+                *[check_health(m) for m in self.fallback_models],
+                return_exceptions=True
+            )
+            
+            healthy_models = []
+            for fallback_model, is_healthy in zip(self.fallback_models, health_results):
+                if isinstance(is_healthy, Exception):
+                    logger.error("Fallback %s failed: %s", fallback_model, is_healthy)
+                elif not is_healthy:
+                    logger.warning("Fallback model %s is unhealthy, skipping", fallback_model)
+                else:
+                    healthy_models.append(fallback_model)
+            
+            if not healthy_models:
+                return None
+            
+            # Bound once as locals so the attempts read closure cells instead of attributes
+            semaphore = asyncio.Semaphore(self.max_parallel_fallbacks)
+            submit = process_model.apply_async
+            options, queue, timeout = self.options, self.queue, self.task_timeout
+            config_key = self._config_fingerprint()
+            distributed = self.model_manager.config.distributed
+            
+            async def attempt(fallback_model: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+                async with semaphore:
+                    logger.info("Trying fallback model %s", fallback_model)
+                    try:
+                        if distributed.max_batch_size > 1:
+                            # Coalesce with other steps falling back to the same model
+                            result = await _model_batcher.submit(
+                                fallback_model,
+                                prompt,
+                                options,
+                                config_payload,
+                                config_key,
+                                queue,
+                                timeout,
+                                distributed.batch_window_ms,
+                                distributed.max_batch_size
+                            )
+                        else:
+                            # Submit task to Celery with fallback model
+                            task: AsyncResult = submit(
+                                args=(
+                                    fallback_model,
+                                    prompt,
+                                    options,
+                                    config_payload
+                                ),
+                                queue=queue,
+                                expires=timeout * 2
+                            )
+                            result = await _wait_for_task(task, timeout)
+                    except Exception as e:
+                        logger.error("Fallback %s failed: %s", fallback_model, e)
+                        return fallback_model, None
+                    
+                    if "error" in result:
+                        logger.error("Fallback %s failed: %s", fallback_model, result["error"])
+                        return fallback_model, None
+                    return fallback_model, result
+            
+            attempts = [asyncio.ensure_future(attempt(m)) for m in healthy_models]
+            try:
+                for next_done in asyncio.as_completed(attempts):
+                    fallback_model, result = await next_done
+                    if result is not None:
+                        logger.info("Fallback model %s succeeded", fallback_model)
+                        return fallback_model, result
+                return None
+            finally:
+                for pending in attempts:
+                    pending.cancel()
+        
         async def get_fallback(self, data: Dict[str, Any]) -> Dict[str, Any]:
             """Try fallback models when primary model fails"""
-            for fallback_model in self.fallback_models:
-                logger.info(f"Trying fallback model {fallback_model}")
-                
-                # Format prompt
-                prompt = self._format_prompt(data)
-                
-                try:
-                    # Check health of fallback model
-                    is_healthy = await self.model_manager.check_model_health(fallback_model)
-                    if not is_healthy:
-                        logger.warning(f"Fallback model {fallback_model} is unhealthy, skipping")
-                        continue
-                    
-                    # Submit task to Celery with fallback model
-                    task: AsyncResult = process_model.delay(
-                        fallback_model,
-                        prompt,
-                        self.options,
-                        self.model_manager.config.__dict__ if not hasattr(self.model_manager.config, 'model_dump') else self.model_manager.config.model_dump()
-                    )
-                    
-                    # Wait for the task to complete
-                    result = task.get(timeout=self.task_timeout)
-                    
-                    # Check for success
-                    if "error" not in result:
-                        logger.info(f"Fallback model {fallback_model} succeeded")
-                        return {
-                            "output": result,
-                            "time": result.get("execution_time", 0),
-                            "model": fallback_model,
-                            "status": "success",
-                            "prompt": prompt,
-                            "fallback": True
-                        }
-                except Exception as e:
-                    logger.error(f"Fallback {fallback_model} failed: {e}")
-                    continue
+            # The prompt and config do not depend on the fallback model, so build them once
+            prompt = self._format_prompt(data)
+            
+            winner = await self._first_fallback_result(prompt, self._config_payload())
+            if winner is not None:
+                fallback_model, result = winner
+                return {
+                    "output": result,
+                    "time": result.get("execution_time", 0),
+                    "model": fallback_model,
+                    "status": "success",
+                    "prompt": prompt,
+                    "fallback": True
+                }
             
             # All fallbacks failed
-            logger.error(f"All fallback models failed for {self.model_name}")
+            logger.error("All fallback models failed for %s", self.model_name)
             return {
                 "output": {"response": "All models failed to generate a response", "error": "all_models_failed"},
                 "time": 0,
@@ -425,89 +956,248 @@ if celery_installed and redis_installed:
             self.steps = steps
             self.config = config
         
-        async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        @staticmethod
+        def _step_model_name(step_config_or_instance: Union[Dict, CeleryModelStep]) -> str:
+            """Get the model name of a step config or instance for error reporting"""
+            if isinstance(step_config_or_instance, dict):
+                return step_config_or_instance.get("model_name", "unknown")
+            return getattr(step_config_or_instance, "model_name", "unknown")
+        
+        @staticmethod
+        def _step_output(result: Dict[str, Any]) -> Dict[str, Any]:
+            """Get a step's output in the dict form passed to dependent steps"""
+            output = result.get("output", {})
+            if not isinstance(output, dict):
+                output = {"response": str(output)}
+            return output
+        
+        @staticmethod
+        def _execution_error(name: str, e: Exception) -> Dict[str, Any]:
+            """Build the result for a step that raised an exception"""
+            return {
+                "output": {"response": f"Error: {str(e)}", "error": "execution_error"},
+                "time": 0,
+                "status": "error"
+            }
+        
+        async def _execute_local_step(
+            self,
+            name: str,
+            step: CeleryModelStep,
+            robust_data: Dict[str, Any]
+        ) -> Dict[str, Any]:
+            """Execute a CeleryModelStep instance in this process"""
+            logger.info(f"Running distributed step: {name}")
+            
+            try:
+                return await step.execute(robust_data)
+            except Exception as e:
+                logger.exception("Error executing step %s: %s", name, e)
+                return self._execution_error(name, e)
+        
+        @staticmethod
+        def _join_and_forget(result_set: ResultSet, timeout: float) -> List[Any]:
+            """Block for all results in a set, then delete them from the result backend"""
+            join = result_set.join_native if result_set.supports_native_join else result_set.join
+            values = join(timeout=timeout, propagate=False)
+            result_set.forget()
+            return values
+        
+        @staticmethod
+        def _harvest_after_timeout(tasks: List[AsyncResult]) -> Tuple[List[Any], List[bool]]:
             """
-            Run the pipeline with the given input data.
+            Collect the tasks that finished before a join timed out and revoke the rest.
             
-            This distributes each step to a Celery worker.
+            Collected results are deleted from the result backend, and revoked tasks
+            are not started by a worker that has yet to pick them up.
+            
+            Returns:
+                Tuple[List[Any], List[bool]]: Each task's result (None if unfinished)
+                and whether it timed out
             """
-            results = {}
-            data = input_data.copy()
+            values, timed_out = [], []
+            for task in tasks:
+                if task.ready():
+                    values.append(task.result)
+                    timed_out.append(False)
+                    task.forget()
+                else:
+                    task.revoke()
+                    values.append(None)
+                    timed_out.append(True)
+            return values, timed_out
+        
+        async def _collect_tasks(self, submitted: Dict[str, Tuple[AsyncResult, Dict]]) -> Dict[str, Dict[str, Any]]:
+            """
+            Wait for a level's run_pipeline_step tasks.
             
-            # Sequential execution of steps (could be parallelized in the future)
-            for name, step_config_or_instance, dependencies in self.steps:
-                logger.info(f"Running distributed step: {name}")
+            All results are harvested through a single ResultSet join, which uses
+            the backend's native multi-get (one round-trip for Redis) when supported.
+            The level waits up to the largest task_timeout among its steps.
+            
+            Args:
+                submitted: Mapping of step name to (task, step_config)
                 
-                # Check dependencies
-                missing_deps = [dep for dep in dependencies if dep not in results]
-                if missing_deps:
-                    logger.error(f"Step {name} missing dependencies: {missing_deps}")
+            Returns:
+                Dict[str, Dict[str, Any]]: Step results keyed by step name
+            """
+            if not submitted:
+                return {}
+            
+            names = list(submitted)
+            tasks = [submitted[name][0] for name in names]
+            result_set = ResultSet(tasks)
+            timeout = max(step_config.get("task_timeout", 180) for _, step_config in submitted.values())
+            
+            loop = asyncio.get_event_loop()
+            try:
+                values = await loop.run_in_executor(_celery_wait_executor, self._join_and_forget, result_set, timeout)
+                timed_out = [False] * len(tasks)
+            except celery.exceptions.TimeoutError:
+                # Keep whatever finished; the rest timed out
+                values, timed_out = await loop.run_in_executor(
+                    _celery_wait_executor, self._harvest_after_timeout, tasks
+                )
+            
+            results = {}
+            for name, value, task_timed_out in zip(names, values, timed_out):
+                step_config = submitted[name][1]
+                if isinstance(value, Exception):
+                    logger.error("Error executing step %s: %s", name, value)
+                    results[name] = self._execution_error(name, value)
+                elif task_timed_out:
+                    logger.error(f"Step {name} timed out after {timeout}s")
                     results[name] = {
-                        "output": {"response": f"Missing dependencies: {missing_deps}", "error": "missing_dependencies"},
-                        "time": 0,
-                        "status": "error",
-                        "model": step_config_or_instance.get("model_name", "unknown") if isinstance(step_config_or_instance, dict) else step_config_or_instance.model_name
+                        "output": {"response": "Task timed out", "error": "celery_timeout"},
+                        "time": timeout,
+                        "model": step_config.get("model_name", "unknown"),
+                        "status": "error"
                     }
+                else:
+                    results[name] = value
+            return results
+        
+        async def _execute_level(
+            self,
+            names: List[str],
+            steps: Dict[str, Any],
+            robust_data: Dict[str, Any],
+            config_payload: Dict[str, Any]
+        ) -> Dict[str, Dict[str, Any]]:
+            """Execute a set of independent steps concurrently"""
+            
+            # Submit every Celery step of the level before waiting on anything
+            submitted = {}
+            local_names = []
+            results = {}
+            for name in names:
+                step_config_or_instance = steps[name]
+                
+                # If step_config_or_instance is already a CeleryModelStep instance, use it directly
+                if isinstance(step_config_or_instance, CeleryModelStep):
+                    local_names.append(name)
                     continue
                 
-                # Execute the step
+                # Otherwise, it's a config dict - submit task to Celery
+                logger.info(f"Running distributed step: {name}")
                 try:
-                    # Create a robust version of the data
-                    robust_data = input_data.copy()
-                    
-                    # Add results from previous steps
-                    for prev_name, prev_result in results.items():
-                        prev_output = prev_result.get("output", {})
-                        if not isinstance(prev_output, dict):
-                            prev_output = {"response": str(prev_output)}
-                        robust_data[prev_name] = prev_output
-                    
-                    # If step_config_or_instance is already a CeleryModelStep instance, use it directly
-                    if isinstance(step_config_or_instance, CeleryModelStep):
-                        result = await step_config_or_instance.execute(robust_data)
-                        results[name] = result
-                    else:
-                        # Otherwise, it's a config dict - submit task to Celery
-                        step_config = step_config_or_instance
-                        
-                        task: AsyncResult = run_pipeline_step.delay(
-                            name,
-                            step_config,
-                            robust_data,
-                            self.config.__dict__ if not hasattr(self.config, 'model_dump') else self.config.model_dump()
-                        )
-                        
-                        # Wait for completion with timeout
-                        try:
-                            task_timeout = step_config.get("task_timeout", 180)
-                            result = task.get(timeout=task_timeout)
-                            results[name] = result
-                        except celery.exceptions.TimeoutError:
-                            logger.error(f"Step {name} timed out after {task_timeout}s")
-                            results[name] = {
-                                "output": {"response": "Task timed out", "error": "celery_timeout"},
-                                "time": task_timeout,
-                                "model": step_config.get("model_name", "unknown"),
-                                "status": "error"
-                            }
-                    
-                    # Update data with successful results
-                    if results[name].get("status") == "success":
-                        data[name] = results[name]["output"]
-                    else:
-                        # Add placeholder for failed steps
-                        data[name] = {"response": f"Step {name} failed", "error": "step_failed"}
-                    
-                    logger.info(f"Completed step {name} with status: {results[name].get('status', 'unknown')}")
-                
+                    task: AsyncResult = run_pipeline_step.delay(
+                        name,
+                        step_config_or_instance,
+                        robust_data,
+                        config_payload
+                    )
+                    submitted[name] = (task, step_config_or_instance)
                 except Exception as e:
-                    logger.error(f"Error executing step {name}: {e}")
-                    traceback.print_exc()
-                    results[name] = {
-                        "output": {"response": f"Error: {str(e)}", "error": "execution_error"},
-                        "time": 0,
-                        "status": "error"
-                    }
+                    logger.exception("Error executing step %s: %s", name, e)
+                    results[name] = self._execution_error(name, e)
+            
+            # Run in-process steps while the Celery tasks are being processed
+            collected, *local_results = await asyncio.gather(
+                self._collect_tasks(submitted),
+                *[self._execute_local_step(name, steps[name], robust_data) for name in local_names]
+            )
+            
+            results.update(collected)
+            results.update(zip(local_names, local_results))
+            return {name: results[name] for name in names}
+        
+        async def run_batch(self, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            """
+            Run the pipeline for several inputs concurrently.
+            
+            With distributed.max_batch_size above 1, model requests from the
+            different runs that target the same model (including fallbacks) are
+            coalesced into process_model_batch tasks.
+            
+            Returns:
+                List[Dict[str, Any]]: One pipeline result per input, in the same order
+            """
+            return list(await asyncio.gather(*[self.run(input_data) for input_data in inputs]))
+        
+        async def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+            """
+            Run the pipeline with the given input data.
+            
+            Steps are scheduled by dependency level: every step whose dependencies
+            have completed is distributed to a Celery worker at the same time, so
+            independent branches run concurrently.
+            """
+            results = {}
+            
+            # Serialized once for every task this run submits
+            config_payload = _dump_config(self.config)
+            
+            # Input for the next steps: the original input plus every completed step's output
+            robust_data = input_data.copy()
+            
+            pending = {name: (step, deps) for name, step, deps in self.steps}
+            
+            while pending:
+                # Steps depending on something that is neither done nor scheduled can never run
+                for name, (step_config_or_instance, dependencies) in list(pending.items()):
+                    missing_deps = [dep for dep in dependencies if dep not in results and dep not in pending]
+                    if missing_deps:
+                        logger.error(f"Step {name} missing dependencies: {missing_deps}")
+                        results[name] = {
+                            "output": {"response": f"Missing dependencies: {missing_deps}", "error": "missing_dependencies"},
+                            "time": 0,
+                            "status": "error",
+                            "model": self._step_model_name(step_config_or_instance)
+                        }
+                        robust_data[name] = self._step_output(results[name])
+                        del pending[name]
+                
+                # Find steps that have all dependencies satisfied
+                ready = [
+                    name for name, (_, dependencies) in pending.items()
+                    if all(dep in results for dep in dependencies)
+                ]
+                
+                if not ready:
+                    # Only circular dependencies remain
+                    for name, (step_config_or_instance, dependencies) in pending.items():
+                        unsatisfied = [dep for dep in dependencies if dep not in results]
+                        logger.error(f"Step {name} missing dependencies: {unsatisfied}")
+                        results[name] = {
+                            "output": {"response": f"Missing dependencies: {unsatisfied}", "error": "missing_dependencies"},
+                            "time": 0,
+                            "status": "error",
+                            "model": self._step_model_name(step_config_or_instance)
+                        }
+                    break
+                
+                # Run the whole level concurrently
+                level_results = await self._execute_level(
+                    ready, {name: pending[name][0] for name in ready}, robust_data, config_payload
+                )
+                
+                # Only publish outputs once the whole level is done
+                for name, result in level_results.items():
+                    del pending[name]
+                    results[name] = result
+                    robust_data[name] = self._step_output(result)
+                    logger.info(f"Completed step {name} with status: {result.get('status', 'unknown')}")
             
             # Count successful steps
             success_count = sum(1 for r in results.values() if r.get("status") == "success")
@@ -520,6 +1210,10 @@ if celery_installed and redis_installed:
                 "success_rate": f"{success_count}/{len(results)}"
             }
     
+    # Prompt prefixes for the standard chat roles; other roles are capitalized
+    _ROLE_PREFIX = {"system": "System", "user": "User", "assistant": "Assistant"}
+    _ROLE_AND_CONTENT = itemgetter("role", "content")
+    
     class CelerychatModelStep(CeleryModelStep):
         """Pipeline step for chat-based interaction using Celery"""
         
@@ -532,7 +1226,9 @@ if celery_installed and redis_installed:
                     task_timeout: int = 180,
                     use_patching: Optional[bool] = None,
                     max_patching_attempts: Optional[int] = None,
-                    patching_prompt: Optional[str] = None):
+                    patching_prompt: Optional[str] = None,
+                    queue: Optional[str] = None,
+                    max_parallel_fallbacks: int = 3):
             super().__init__(
                 model_manager=model_manager,
                 model_name=model_name,
@@ -542,7 +1238,9 @@ if celery_installed and redis_installed:
                 task_timeout=task_timeout,
                 use_patching=use_patching,
                 max_patching_attempts=max_patching_attempts,
-                patching_prompt=patching_prompt
+                patching_prompt=patching_prompt,
+                queue=queue,
+                max_parallel_fallbacks=max_parallel_fallbacks
             )
             self.system_prompt = system_prompt
         
@@ -568,17 +1266,16 @@ if celery_installed and redis_installed:
             if "query" in data:
                 messages.append({"role": "user", "content": data["query"]})
             
-            # Add context from previous steps if available
-            context_parts = []
-            for key in data:
-                if key != "query" and isinstance(data[key], dict):
-                    if "response" in data[key]:
-                        context_parts.append(f"{key.capitalize()} analysis: {data[key]['response']}")
-            
-            if context_parts and not self.system_prompt:
-                # Add context as a system message if we don't already have one
-                context = "\n\n".join(context_parts)
-                messages.insert(0, {"role": "system", "content": f"Context:\n{context}"})
+            # Add context from previous steps as a system message if we don't already have one
+            if not self.system_prompt:
+                context_parts = [
+                    f"{key.capitalize()} analysis: {value['response']}"
+                    for key, value in data.items()
+                    if key != "query" and isinstance(value, dict) and "response" in value
+                ]
+                if context_parts:
+                    context = "\n\n".join(context_parts)
+                    messages.insert(0, {"role": "system", "content": f"Context:\n{context}"})
             
             return messages
         
@@ -605,16 +1302,20 @@ if celery_installed and redis_installed:
                 prompt = self._messages_to_prompt(messages)
                 
                 # Submit task to Celery
-                task: AsyncResult = process_model.delay(
-                    self.model_name,
-                    prompt,
-                    self.options,
-                    self.model_manager.config.__dict__ if not hasattr(self.model_manager.config, 'model_dump') else self.model_manager.config.model_dump()
+                task: AsyncResult = process_model.apply_async(
+                    args=(
+                        self.model_name,
+                        prompt,
+                        self.options,
+                        self._config_payload()
+                    ),
+                    queue=self.queue,
+                    expires=self.task_timeout * 2
                 )
                 
                 # Wait for the task to complete with timeout
                 try:
-                    result = task.get(timeout=self.task_timeout)
+                    result = await _wait_for_task(task, self.task_timeout)
                 except celery.exceptions.TimeoutError:
                     logger.error(f"Celery chat task timed out after {self.task_timeout}s")
                     if self.fallback_models:
@@ -640,18 +1341,12 @@ if celery_installed and redis_installed:
                 # Process the result
                 status = "success" if "error" not in result else "error"
                 
-                # Convert to chat response format
+                # Convert to chat response format in place
                 if "response" in result:
-                    chat_result = {
-                        "message": {
-                            "role": "assistant",
-                            "content": result["response"]
-                        }
+                    result["message"] = {
+                        "role": "assistant",
+                        "content": result.pop("response")
                     }
-                    for key in result:
-                        if key != "response":
-                            chat_result[key] = result[key]
-                    result = chat_result
                 
                 return {
                     "output": result,
@@ -662,8 +1357,7 @@ if celery_installed and redis_installed:
                 }
             
             except Exception as e:
-                logger.error(f"Error in {self.model_name} chat step: {e}")
-                traceback.print_exc()
+                logger.exception("Error in %s chat step: %s", self.model_name, e)
                 
                 if self.fallback_models:
                     logger.info(f"Trying fallback models after exception in {self.model_name}")
@@ -679,83 +1373,48 @@ if celery_installed and redis_installed:
         
         def _messages_to_prompt(self, messages: List[Dict[str, str]]) -> str:
             """Convert chat messages to a formatted prompt"""
-            prompt_parts = []
-            
-            for message in messages:
-                role = message.get("role", "")
-                content = message.get("content", "")
-                
-                if role == "system":
-                    prompt_parts.append(f"System: {content}")
-                elif role == "user":
-                    prompt_parts.append(f"User: {content}")
-                elif role == "assistant":
-                    prompt_parts.append(f"Assistant: {content}")
-                else:
-                    prompt_parts.append(f"{role.capitalize()}: {content}")
-            
-            return "\n\n".join(prompt_parts) + "\n\nAssistant:"
+            try:
+                # Fast path: every message has both keys, so fetch them with one call
+                prompt = "\n\n".join([
+                    f"{_ROLE_PREFIX.get(role) or role.capitalize()}: {content}"
+                    for role, content in map(_ROLE_AND_CONTENT, messages)
+                ])
+            except KeyError:
+                prompt = "\n\n".join([
+                    f"{_ROLE_PREFIX.get(role) or role.capitalize()}: {message.get('content', '')}"
+                    for message in messages
+                    for role in (message.get("role", ""),)
+                ])
+            return prompt + "\n\nAssistant:"
         
         async def get_fallback(self, data: Dict[str, Any]) -> Dict[str, Any]:
             """Try fallback models when primary chat model fails"""
-            for fallback_model in self.fallback_models:
-                logger.info(f"Trying fallback model {fallback_model}")
-                
-                # Prepare messages
-                messages = self._prepare_messages(data)
+            # The messages and prompt do not depend on the fallback model, so build them once
+            messages = self._prepare_messages(data)
+            prompt = self._messages_to_prompt(messages)
+            
+            winner = await self._first_fallback_result(prompt, self._config_payload())
+            if winner is not None:
+                fallback_model, result = winner
                 
-                # Convert to prompt for now
-                prompt = self._messages_to_prompt(messages)
+                # Convert to chat response format in place
+                if "response" in result:
+                    result["message"] = {
+                        "role": "assistant",
+                        "content": result.pop("response")
+                    }
                 
-                try:
-                    # Check health of fallback model
-                    is_healthy = await self.model_manager.check_model_health(fallback_model)
-                    if not is_healthy:
-                        logger.warning(f"Fallback model {fallback_model} is also unhealthy, skipping")
-                        continue
-                    
-                    # Submit task to Celery with fallback model
-                    task: AsyncResult = process_model.delay(
-                        fallback_model,
-                        prompt,
-                        self.options,
-                        self.model_manager.config.__dict__ if not hasattr(self.model_manager.config, 'model_dump') else self.model_manager.config.model_dump()
-                    )
-                    
-                    # Wait for the task to complete
-                    result = task.get(timeout=self.task_timeout)
-                    
-                    # Check for success
-                    if "error" not in result:
-                        logger.info(f"Fallback model {fallback_model} succeeded")
-                        
-                        # Convert to chat response format
-                        if "response" in result:
-                            chat_result = {
-                                "message": {
-                                    "role": "assistant",
-                                    "content": result["response"]
-                                }
-                            }
-                            for key in result:
-                                if key != "response":
-                                    chat_result[key] = result[key]
-                            result = chat_result
-                        
-                        return {
-                            "output": result,
-                            "time": result.get("execution_time", 0),
-                            "model": fallback_model,
-                            "status": "success",
-                            "messages": messages,
-                            "fallback": True
-                        }
-                except Exception as e:
-                    logger.error(f"Fallback {fallback_model} chat failed: {e}")
-                    continue
+                return {
+                    "output": result,
+                    "time": result.get("execution_time", 0),
+                    "model": fallback_model,
+                    "status": "success",
+                    "messages": messages,
+                    "fallback": True
+                }
             
             # All fallbacks failed
-            logger.error(f"All fallback models failed for {self.model_name} chat")
+            logger.error("All fallback models failed for %s chat", self.model_name)
             return {
                 "output": {
                     "message": {"content": "All models failed to generate a chat response"},
@@ -795,4 +1454,5 @@ else:
     
     celery_app = None
     process_model = None
+    process_model_batch = None
     run_pipeline_step = None
@@ -45,7 +45,15 @@ setup(
         "celery": [
             "celery>=5.3.0",
             "redis>=4.5.0",
-            "flower>=2.0.0"
+            "flower>=2.0.0",
+            "orjson>=3.9.0",
+            "msgpack>=1.0.0",
+            "uvloop>=0.17.0; sys_platform != 'win32'"
+        ],
+        "fast": [
+            "orjson>=3.9.0",
+            "xxhash>=3.0.0",
+            "google-re2>=1.0"
         ],
         "dev": [
             "pytest>=7.0.0",
@@ -59,6 +67,11 @@ setup(
             "celery>=5.3.0",
             "redis>=4.5.0",
             "flower>=2.0.0",
+            "orjson>=3.9.0",
+            "msgpack>=1.0.0",
+            "uvloop>=0.17.0; sys_platform != 'win32'",
+            "xxhash>=3.0.0",
+            "google-re2>=1.0",
             "pytest>=7.0.0",
             "pytest-asyncio>=0.21.0",
             "black>=23.0.0",
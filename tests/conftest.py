@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pasture/tests/conftest.py
+
+Shared fixtures for the PASTURE test suite.
+"""
+
+import pytest
+
+from pasture import Config
+
+@pytest.fixture(scope="session")
+def config():
+    """Create a simulation-mode Config shared by all tests; tests must not modify it."""
+    return Config(
+        simulation_mode=True,
+        request_timeout=5.0
+    )
@@ -8,10 +8,14 @@ NOTE: These tests will be skipped if Celery is not installed.
 """
 
 import asyncio
+import importlib.util
 import sys
+import time
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 
+from pasture import Config
+
 # Check if Celery is installed, skip tests if not
 try:
     import celery
@@ -19,6 +23,11 @@ try:
 except ImportError:
     CELERY_INSTALLED = False
 
+# The distributed extension also needs Redis
+DISTRIBUTED_INSTALLED = CELERY_INSTALLED and importlib.util.find_spec("redis") is not None
+if DISTRIBUTED_INSTALLED:
+    from pasture import pasture_distributed as distributed
+
 pytestmark = pytest.mark.skipif(not CELERY_INSTALLED, reason="Celery not installed")
 
 # Import custom CeleryModelStep only if Celery is available
@@ -97,3 +106,259 @@ class TestCeleryIntegration:
         assert result["status"] == "success"
         assert result["fallback"] is True
         assert "Fallback response" in result["output"]["response"]
+
+
+class FakeAsyncResult:
+    """Stand-in for a Celery AsyncResult whose value is ready after a delay."""
+    
+    def __init__(self, value=None, delay=0.0, error=None, ready=True):
+        self.value = value
+        self.delay = delay
+        self.error = error
+        self.done = ready
+        self.forgotten = False
+        self.revoked = False
+    
+    @property
+    def result(self):
+        return self.error or self.value
+    
+    def get(self, timeout=None):
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.value
+    
+    def ready(self):
+        return self.done
+    
+    def forget(self):
+        self.forgotten = True
+    
+    def revoke(self):
+        self.revoked = True
+
+class StubModelManager:
+    """Lightweight stand-in for ModelManager used by CeleryModelStep."""
+    
+    def __init__(self, config, healthy=True):
+        self.config = config
+        self.healthy = healthy
+        self.generate_calls = []
+    
+    async def check_model_health(self, model_name):
+        return self.healthy
+    
+    async def generate_with_model(self, model_name, prompt, options=None):
+        self.generate_calls.append((model_name, prompt, options))
+        return {"response": f"Local response from {model_name}"}
+
+def batch_task(calls, delay=0.0, error=None):
+    """Build a process_model_batch.apply_async replacement that records each batch."""
+    def apply_async(args, queue=None, expires=None):
+        model_name, requests, config_dict = args
+        calls.append((model_name, [prompt for prompt, _ in requests]))
+        value = [{"response": f"{model_name}: {prompt}"} for prompt, _ in requests]
+        return FakeAsyncResult(value, delay=delay, error=error)
+    return apply_async
+
+@pytest.mark.skipif(not DISTRIBUTED_INSTALLED, reason="Celery and Redis not installed")
+class TestModelRequestBatcher:
+    """Test suite for coalescing model requests into process_model_batch tasks."""
+    
+    async def submit_all(self, batcher, prompts, batch_window_ms=5.0, max_batch_size=4):
+        return await asyncio.gather(*[
+            batcher.submit("llama3", prompt, {"temperature": 0.7}, {}, "config", None, 5.0, batch_window_ms, max_batch_size)
+            for prompt in prompts
+        ], return_exceptions=True)
+    
+    @pytest.mark.asyncio
+    async def test_full_batch_submitted_without_waiting(self):
+        """Test that a batch reaching max_batch_size is submitted before its window closes."""
+        calls = []
+        batcher = distributed._ModelRequestBatcher()
+        with patch.object(distributed.process_model_batch, "apply_async", side_effect=batch_task(calls)):
+            start = time.perf_counter()
+            results = await self.submit_all(batcher, ["a", "b", "c"], batch_window_ms=10000, max_batch_size=3)
+            elapsed = time.perf_counter() - start
+        
+        assert calls == [("llama3", ["a", "b", "c"])]
+        assert results == [{"response": "llama3: a"}, {"response": "llama3: b"}, {"response": "llama3: c"}]
+        assert elapsed < 1.0
+        assert not batcher._pending and not batcher._tasks
+    
+    @pytest.mark.asyncio
+    async def test_partial_batch_submitted_after_window(self):
+        """Test that requests arriving within the window share one task."""
+        calls = []
+        batcher = distributed._ModelRequestBatcher()
+        with patch.object(distributed.process_model_batch, "apply_async", side_effect=batch_task(calls)):
+            results = await self.submit_all(batcher, ["a", "b"], batch_window_ms=20, max_batch_size=10)
+        
+        assert calls == [("llama3", ["a", "b"])]
+        assert results == [{"response": "llama3: a"}, {"response": "llama3: b"}]
+        assert not batcher._pending and not batcher._tasks
+    
+    @pytest.mark.asyncio
+    async def test_batch_error_reaches_every_caller(self):
+        """Test that a failed batch task raises in every caller of the batch."""
+        calls = []
+        batcher = distributed._ModelRequestBatcher()
+        error = RuntimeError("Worker lost")
+        with patch.object(distributed.process_model_batch, "apply_async", side_effect=batch_task(calls, error=error)):
+            results = await self.submit_all(batcher, ["a", "b"], batch_window_ms=5)
+        
+        assert len(calls) == 1
+        assert results == [error, error]
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_callers_revoke_batch_task(self):
+        """Test that cancelling every caller of a submitted batch revokes its task."""
+        tasks = []
+        
+        def apply_async(args, queue=None, expires=None):
+            tasks.append(FakeAsyncResult([{"response": "late"}] * len(args[1]), delay=0.3))
+            return tasks[-1]
+        
+        batcher = distributed._ModelRequestBatcher()
+        with patch.object(distributed.process_model_batch, "apply_async", side_effect=apply_async):
+            callers = [
+                asyncio.ensure_future(self.submit_all(batcher, [prompt], batch_window_ms=0, max_batch_size=2))
+                for prompt in ["a", "b"]
+            ]
+            await asyncio.sleep(0.05)
+            assert len(tasks) == 1
+            for caller in callers:
+                caller.cancel()
+            await asyncio.gather(*callers, return_exceptions=True)
+            await asyncio.sleep(0.05)
+        
+        assert tasks[0].revoked
+        assert not batcher._tasks
+
+@pytest.mark.skipif(not DISTRIBUTED_INSTALLED, reason="Celery and Redis not installed")
+class TestDistributedPipeline:
+    """Test suite for scheduling and collecting distributed pipeline steps."""
+    
+    @pytest.mark.asyncio
+    async def test_independent_steps_submitted_together(self):
+        """Test that each dependency level is submitted at once and feeds the next level."""
+        submitted = []
+        
+        def delay(name, step_config, data, config_dict):
+            submitted.append((name, dict(data)))
+            return FakeAsyncResult({"output": {"response": f"Response from {name}"}, "time": 0.1, "status": "success"})
+        
+        pipeline = distributed.DistributedPipeline(
+            steps=[
+                ("economic", {"model_name": "llama3"}, []),
+                ("social", {"model_name": "llama3"}, []),
+                ("integration", {"model_name": "llama3"}, ["economic", "social"])
+            ],
+            config=Config(simulation_mode=True)
+        )
+        
+        with patch.object(distributed.run_pipeline_step, "delay", side_effect=delay), \
+                patch.object(distributed, "ResultSet", side_effect=list), \
+                patch.object(distributed.DistributedPipeline, "_join_and_forget",
+                             staticmethod(lambda tasks, timeout: [task.get() for task in tasks])):
+            results = await pipeline.run({"query": "Test query"})
+        
+        assert [name for name, _ in submitted] == ["economic", "social", "integration"]
+        # Both first-level steps saw only the input; the integration step saw their outputs
+        assert submitted[0][1] == submitted[1][1] == {"query": "Test query"}
+        assert submitted[2][1]["economic"] == {"response": "Response from economic"}
+        assert submitted[2][1]["social"] == {"response": "Response from social"}
+        assert results["success_count"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_join_timeout_keeps_finished_and_revokes_rest(self):
+        """Test that a timed-out join forgets finished results and revokes unfinished tasks."""
+        finished = FakeAsyncResult({"output": {"response": "Done"}, "status": "success"})
+        unfinished = FakeAsyncResult(ready=False)
+        pipeline = distributed.DistributedPipeline(steps=[], config=Config(simulation_mode=True))
+        
+        def join_timeout(tasks, timeout):
+            raise celery.exceptions.TimeoutError()
+        
+        with patch.object(distributed, "ResultSet", side_effect=list), \
+                patch.object(distributed.DistributedPipeline, "_join_and_forget", staticmethod(join_timeout)):
+            results = await pipeline._collect_tasks({
+                "done": (finished, {"model_name": "llama3", "task_timeout": 1}),
+                "slow": (unfinished, {"model_name": "mistral", "task_timeout": 1})
+            })
+        
+        assert results["done"] == {"output": {"response": "Done"}, "status": "success"}
+        assert results["slow"]["output"]["error"] == "celery_timeout"
+        assert results["slow"]["model"] == "mistral"
+        assert finished.forgotten and not finished.revoked
+        assert unfinished.revoked and not unfinished.forgotten
+    
+    @pytest.mark.asyncio
+    async def test_run_batch_coalesces_model_requests(self):
+        """Test that concurrent runs share process_model_batch tasks for the same model."""
+        calls = []
+        config = Config(simulation_mode=True, distributed={"max_batch_size": 4, "batch_window_ms": 20})
+        step = distributed.CeleryModelStep(StubModelManager(config), "llama3", "Query: {query}")
+        pipeline = distributed.DistributedPipeline(steps=[("analysis", step, [])], config=config)
+        
+        with patch.object(distributed.process_model_batch, "apply_async", side_effect=batch_task(calls)):
+            results = await pipeline.run_batch([{"query": "a"}, {"query": "b"}, {"query": "c"}])
+        
+        assert calls == [("llama3", ["Query: a", "Query: b", "Query: c"])]
+        assert [r["results"]["analysis"]["output"]["response"] for r in results] == [
+            "llama3: Query: a", "llama3: Query: b", "llama3: Query: c"
+        ]
+
+@pytest.mark.skipif(not DISTRIBUTED_INSTALLED, reason="Celery and Redis not installed")
+class TestCeleryModelStepExecution:
+    """Test suite for CeleryModelStep submission, inline mode and fallbacks."""
+    
+    @pytest.mark.asyncio
+    async def test_inline_mode_without_workers(self):
+        """Test that inline mode runs the model in-process when no worker is available."""
+        config = Config(simulation_mode=True, distributed={"inline": True})
+        model_manager = StubModelManager(config)
+        step = distributed.CeleryModelStep(model_manager, "llama3", "Query: {query}")
+        
+        with patch.object(distributed, "_workers_available", AsyncMock(return_value=False)), \
+                patch.object(distributed.process_model, "apply_async") as apply_async:
+            result = await step.execute({"query": "Test query"})
+        
+        apply_async.assert_not_called()
+        assert model_manager.generate_calls == [("llama3", "Query: Test query", {"temperature": 0.7})]
+        assert result["status"] == "success"
+        assert result["output"]["response"] == "Local response from llama3"
+    
+    @pytest.mark.asyncio
+    async def test_fallbacks_race_and_first_success_wins(self):
+        """Test that fallbacks run concurrently, failures are skipped and slower attempts are revoked."""
+        tasks = {}
+        outcomes = {
+            "failing": ({"error": "model_error"}, 0.0),
+            "fast": ({"response": "Fast answer", "execution_time": 0.1}, 0.05),
+            "slow": ({"response": "Slow answer"}, 0.5)
+        }
+        
+        def apply_async(args, queue=None, expires=None):
+            value, delay = outcomes[args[0]]
+            tasks[args[0]] = FakeAsyncResult(value, delay=delay)
+            return tasks[args[0]]
+        
+        config = Config(simulation_mode=True)
+        step = distributed.CeleryModelStep(
+            StubModelManager(config), "llama3", "Query: {query}", fallback_models=["failing", "slow", "fast"]
+        )
+        
+        with patch.object(distributed.process_model, "apply_async", side_effect=apply_async):
+            start = time.perf_counter()
+            result = await step.get_fallback({"query": "Test query"})
+            elapsed = time.perf_counter() - start
+            await asyncio.sleep(0.05)
+        
+        assert result["model"] == "fast"
+        assert result["output"]["response"] == "Fast answer"
+        assert result["fallback"] is True
+        assert elapsed < 0.5
+        assert tasks["slow"].revoked
+        assert not tasks["fast"].revoked
@@ -7,6 +7,7 @@ Unit tests for the FileCache class in the PASTURE framework.
 """
 
 import asyncio
+import json
 import os
 import time
 import tempfile
@@ -115,6 +116,30 @@ class TestFileCache:
         
         assert result == value
     
+    @pytest.mark.asyncio
+    async def test_stats_and_clear(self, cache, cache_dir):
+        """Test cache statistics and clearing single and all entries."""
+        await cache.set("active", {"data": 1})
+        await cache.set("other", {"data": 2})
+        await cache.set("expired", {"data": 3}, ttl=-1)
+        
+        stats = await cache.get_stats()
+        assert stats["total_entries"] == 3
+        assert stats["expired_entries"] == 1
+        assert stats["active_entries"] == 2
+        assert stats["cache_size_bytes"] == sum(path.stat().st_size for path in Path(cache_dir).glob("*.json"))
+        
+        await cache.clear("active")
+        assert await cache.get("active") is None
+        assert await cache.get("other") == {"data": 2}
+        
+        # Clearing a missing key is a no-op
+        await cache.clear("active")
+        
+        await cache.clear()
+        assert list(Path(cache_dir).glob("*.json")) == []
+        assert (await cache.get_stats())["total_entries"] == 0
+    
     def test_hash_key(self, cache):
         """Test the hash_key method creates consistent hashes."""
         key1 = "test_key"
@@ -132,3 +157,50 @@ class TestFileCache:
         
         # Hashes should be valid filenames (check for invalid chars)
         assert all(c.isalnum() or c == '-' for c in hash1)
+    
+    @pytest.mark.asyncio
+    async def test_entry_file_format(self, cache, cache_dir):
+        """Test that entries are stored as plain JSON cache entries."""
+        key = "format_key"
+        value = {"data": "stored_value"}
+        
+        await cache.set(key, value, ttl=60)
+        
+        file_path = Path(cache_dir) / f"{cache._hash_key(key)}.json"
+        data = json.loads(file_path.read_text())
+        
+        assert data["value"] == value
+        assert data["expires_at"] > data["created_at"]
+    
+    @pytest.mark.asyncio
+    async def test_cache_scan_resistance(self, cache_dir):
+        """Test that a stream of one-off keys does not evict frequently used entries."""
+        cache = FileCache(cache_dir, max_entries=10)
+        hot_keys = [f"hot_key_{i}" for i in range(5)]
+        
+        # Request the hot keys repeatedly, caching them on the first miss
+        for _ in range(5):
+            for key in hot_keys:
+                if await cache.get(key) is None:
+                    await cache.set(key, {"data": key})
+        
+        # Stream many unique keys through the cache
+        for i in range(100):
+            await cache.set(f"scan_key_{i}", {"data": i})
+        
+        for key in hot_keys:
+            assert await cache.get(key) == {"data": key}
+        assert len(list(Path(cache_dir).glob("*.json"))) <= 10
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_eviction_leaves_no_untracked_files(self, cache_dir):
+        """Test that concurrent writes to a bounded cache keep its files and entries in sync."""
+        cache = FileCache(cache_dir, max_entries=10)
+        
+        # Repeated rounds raise key frequencies so new writes keep evicting across shards
+        for _ in range(3):
+            await asyncio.gather(*[cache.set(f"key_{i}", {"data": i}) for i in range(50)])
+        
+        files = {path.stem for path in Path(cache_dir).glob("*.json")}
+        assert files == set(cache._entries)
+        assert len(files) <= 10
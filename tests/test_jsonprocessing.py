@@ -82,6 +82,20 @@ class TestJSONProcessor:
         assert parsed["outer"]["inner"] == "value"
         assert parsed["outer"]["nested"] == [1, 2, 3]
     
+    def test_repair_json_preserves_string_contents(self):
+        """Test that repairs do not rewrite the contents of string values."""
+        # Colons and apostrophes inside strings are left alone
+        fixed = JSONProcessor.repair_json("{'time': '10:30', note: \"it's fine\",}")
+        assert json.loads(fixed) == {"time": "10:30", "note": "it's fine"}
+        
+        # Broken JSON inside a markdown fence is repaired
+        fixed = JSONProcessor.repair_json("```json\n{key: 'value'}\n```")
+        assert json.loads(fixed) == {"key": "value"}
+        
+        # Numeric property names are quoted too
+        fixed = JSONProcessor.repair_json("{1: 2, 'b': {3: 'x'}}")
+        assert json.loads(fixed) == {"1": 2, "b": {"3": "x"}}
+    
     def test_parse(self):
         """Test the parse method."""
         # Valid JSON
@@ -7,34 +7,57 @@ Unit tests for the ModelManager class in the PASTURE framework.
 """
 
 import asyncio
+import contextlib
 import json
+import socket
+import time
 from unittest.mock import patch, MagicMock, AsyncMock
 
 import pytest
 import aiohttp
-from aiohttp import ClientSession, ClientResponse
+from aiohttp import ClientSession, ClientResponse, web
 
-from pasture import Config, FileCache, ModelManager
+from pasture import Config, ModelManager
+
+@contextlib.asynccontextmanager
+async def serve_ollama_api(handlers):
+    """Serve the given /api/<endpoint> POST handlers locally, yielding the base URL."""
+    app = web.Application()
+    for endpoint, handler in handlers.items():
+        app.router.add_post(f"/api/{endpoint}", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    # A large backlog keeps bursts of connects from hitting SYN retries
+    await web.SockSite(runner, sock, backlog=1024).start()
+    try:
+        yield f"http://127.0.0.1:{sock.getsockname()[1]}"
+    finally:
+        await runner.cleanup()
+
+class StubCache:
+    """Lightweight stand-in for FileCache that records calls and returns a fixed value."""
+    
+    def __init__(self, value=None):
+        self.value = value
+        self.get_calls = []
+        self.set_calls = []
+    
+    async def get(self, key):
+        self.get_calls.append(key)
+        return self.value
+    
+    async def set(self, key, value, ttl=None):
+        self.set_calls.append((key, value, ttl))
 
 class TestModelManager:
     """Test suite for the ModelManager class."""
     
-    @pytest.fixture
-    def config(self):
-        """Create a Config instance with simulation mode."""
-        return Config(
-            simulation_mode=True,
-            cache_dir="./test_cache",
-            request_timeout=5.0
-        )
-    
     @pytest.fixture
     def cache(self, config):
-        """Create a FileCache instance with mock implementation."""
-        cache = MagicMock(spec=FileCache)
-        cache.get = AsyncMock(return_value=None)
-        cache.set = AsyncMock()
-        return cache
+        """Create a stub FileCache that always misses."""
+        return StubCache()
     
     @pytest.fixture
     def model_manager(self, config, cache):
@@ -86,13 +109,20 @@ class TestModelManager:
             "llama3", "Tell me about AI."
         )
         assert "response" in generic_result
+        
+        # Mutating one simulated response does not leak into the next
+        economic_result["economic_impacts"]["short_term"] = "Changed"
+        repeat_result = await model_manager.generate_with_model(
+            "llama3", "Analyze the economic impact of AI again."
+        )
+        assert repeat_result["economic_impacts"]["short_term"] == "Increased automation and efficiency"
     
     @pytest.mark.asyncio
     async def test_cache_hit(self, model_manager, cache):
         """Test using cached response."""
         # Set up cache to return a mock response
         cached_response = {"response": "Cached response"}
-        cache.get.return_value = cached_response
+        cache.value = cached_response
         
         result = await model_manager.generate_with_model("llama3", "Any prompt")
         
@@ -100,10 +130,26 @@ class TestModelManager:
         assert result == cached_response
         
         # Should have checked cache
-        cache.get.assert_called_once()
+        assert len(cache.get_calls) == 1
         
         # Should not set cache again
-        cache.set.assert_not_called()
+        assert cache.set_calls == []
+    
+    def test_cache_key(self, model_manager):
+        """Test that cache keys depend on model, prompt and options but not option order."""
+        key = model_manager._create_cache_key("llama3", "Test prompt", {"temperature": 0.7, "top_p": 0.9})
+        
+        assert key == model_manager._create_cache_key("llama3", "Test prompt", {"top_p": 0.9, "temperature": 0.7})
+        assert key != model_manager._create_cache_key("llama3", "Test prompt", {"temperature": 0.5, "top_p": 0.9})
+        assert key != model_manager._create_cache_key("mistral", "Test prompt", {"temperature": 0.7, "top_p": 0.9})
+        assert key != model_manager._create_cache_key("llama3", "Other prompt", {"temperature": 0.7, "top_p": 0.9})
+        
+        # Chat keys depend on the messages and format, and differ from generate keys
+        messages = [{"role": "user", "content": "Test prompt"}]
+        chat_key = model_manager._create_cache_key("llama3", "", {}, messages=messages)
+        assert chat_key != model_manager._create_cache_key("llama3", "", {})
+        assert chat_key == model_manager._create_cache_key("llama3", "", {}, messages=list(messages))
+        assert chat_key != model_manager._create_cache_key("llama3", "", {}, messages=messages, format={"type": "object"})
     
     @pytest.mark.asyncio
     async def test_generate_with_options(self, model_manager):
@@ -126,35 +172,141 @@ class TestModelManager:
             request_timeout=5.0
         )
         
-        # Mock the aiohttp ClientSession
-        with patch('aiohttp.ClientSession') as mock_session:
-            # Set up the mock response
-            mock_response = AsyncMock()
-            mock_response.status = 200
-            mock_response.json = AsyncMock(return_value={
-                "model": "llama3",
-                "response": "This is a mock response from the Ollama API."
-            })
-            mock_response.__aenter__.return_value = mock_response
-            
-            # Make the session.post method return our mock response
-            session_instance = mock_session.return_value
-            session_instance.post = AsyncMock(return_value=mock_response)
-            session_instance.get = AsyncMock(return_value=mock_response)
-            
-            # Create a model manager with the real config but mocked HTTP
-            manager = ModelManager(real_config, cache)
-            
-            # Test various API methods
-            models = await manager.get_available_models()
-            assert isinstance(models, list)
-            
-            is_healthy = await manager.check_model_health("llama3")
-            assert is_healthy is True
-            
-            response = await manager.generate_with_model("llama3", "Test prompt")
-            assert "response" in response
-            assert response["response"] == "This is a mock response from the Ollama API."
+        # Set up the mock response
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.read = AsyncMock(return_value=json.dumps({
+            "model": "llama3",
+            "response": "This is a mock response from the Ollama API."
+        }).encode())
+        mock_response.__aenter__.return_value = mock_response
+        
+        # Mock the manager's shared session; get/post return async context managers
+        session = MagicMock(spec=ClientSession)
+        session.closed = False
+        session.post = MagicMock(return_value=mock_response)
+        session.get = MagicMock(return_value=mock_response)
+        
+        # Create a model manager with the real config but mocked HTTP
+        manager = ModelManager(real_config, cache)
+        manager.session = session
+        
+        # Test various API methods
+        models = await manager.get_available_models()
+        assert isinstance(models, list)
+        
+        is_healthy = await manager.check_model_health("llama3")
+        assert is_healthy is True
+        
+        response = await manager.generate_with_model("llama3", "Test prompt")
+        assert "response" in response
+        assert response["response"] == "This is a mock response from the Ollama API."
+        
+        # Every call should have gone through the one shared session
+        assert manager.session is session
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_not_throttled(self, cache):
+        """Test that concurrent generations are not serialized by the model lock or connection pool."""
+        delay = 0.5
+        
+        async def handle_generate(request):
+            await asyncio.sleep(delay)
+            return web.json_response({"response": "generated ok"})
+        
+        # Serve the generate endpoint locally so the real connector is exercised
+        async with serve_ollama_api({"generate": handle_generate}) as base_url:
+            config = Config(
+                simulation_mode=False,
+                sequential_execution=False,
+                preload_models=False,
+                request_timeout=5.0,
+                http_pool_size=300
+            )
+            manager = ModelManager(config, cache, base_url=base_url)
+            try:
+                start = time.perf_counter()
+                results = await asyncio.gather(*[
+                    manager.generate_with_model("llama3", f"prompt {i}")
+                    for i in range(300)
+                ])
+                elapsed = time.perf_counter() - start
+            finally:
+                await manager.close()
+        
+        assert all(result["response"] == "generated ok" for result in results)
+        # Serialized on model_lock, or with aiohttp's default pool of 100, this
+        # would take many round-trips
+        assert elapsed < delay * 2
+    
+    @pytest.mark.asyncio
+    async def test_request_retries_server_errors(self, cache):
+        """Test that retryable HTTP errors are retried with backoff and others are not."""
+        statuses = {"generate": [503, 503, 200], "chat": [400, 200], "show": [503, 200]}
+        calls = {"generate": 0, "chat": 0, "show": 0}
+        
+        def handler(endpoint):
+            async def handle(request):
+                status = statuses[endpoint][calls[endpoint]]
+                calls[endpoint] += 1
+                if status != 200:
+                    return web.Response(status=status, text="Unavailable")
+                return web.json_response({"response": "ok"})
+            return handle
+        
+        config = Config(simulation_mode=False, request_timeout=5.0, retry={"min_wait": 0.01, "max_wait": 0.05})
+        handlers = {endpoint: handler(endpoint) for endpoint in statuses}
+        async with serve_ollama_api(handlers) as base_url:
+            manager = ModelManager(config, cache, base_url=base_url)
+            try:
+                result = await manager._request("generate", method="POST", json_data={"model": "llama3"}, with_retry=True)
+                error = await manager._request("chat", method="POST", json_data={"model": "llama3"}, with_retry=True)
+                probe = await manager._request("show", method="POST", json_data={"model": "llama3"})
+            finally:
+                await manager.close()
+        
+        # 503 is retried until the third attempt succeeds
+        assert result == {"response": "ok"}
+        assert calls["generate"] == 3
+        
+        # 400 is not in the status forcelist, so it is returned immediately
+        assert error["error"] == "HTTP 400"
+        assert calls["chat"] == 1
+        
+        # Requests made without with_retry get a single attempt
+        assert probe["error"] == "HTTP 503"
+        assert calls["show"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_streamed_response(self, cache):
+        """Test that a streamed NDJSON response is assembled from its chunks."""
+        chunks = [
+            {"model": "llama3", "response": "Hello", "done": False},
+            {"model": "llama3", "response": ", ", "done": False},
+            {"model": "llama3", "response": "world", "done": False},
+            {"model": "llama3", "response": "", "done": True, "eval_count": 3}
+        ]
+        
+        async def handle_generate(request):
+            response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+            await response.prepare(request)
+            for chunk in chunks:
+                await response.write(json.dumps(chunk).encode() + b"\n")
+            await response.write_eof()
+            return response
+        
+        async with serve_ollama_api({"generate": handle_generate}) as base_url:
+            manager = ModelManager(Config(simulation_mode=False, stream_responses=True), cache, base_url=base_url)
+            try:
+                result = await manager._request(
+                    "generate", method="POST", json_data={"model": "llama3", "prompt": "Hi", "stream": True}
+                )
+            finally:
+                await manager.close()
+        
+        assert result["response"] == "Hello, world"
+        assert result["done"] is True
+        assert result["eval_count"] == 3
     
     @pytest.mark.asyncio
     async def test_api_error_handling(self, config, cache):
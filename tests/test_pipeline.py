@@ -7,20 +7,22 @@ Unit tests for the Pipeline and ModelStep classes in the PASTURE framework.
 """
 
 import asyncio
-from unittest.mock import patch, MagicMock, AsyncMock
+from unittest.mock import patch, AsyncMock
 
 import pytest
 
-from pasture import Config, FileCache, ModelManager, AnalysisStep, ModelStep, Pipeline
+from pasture import Config, FileCache, AnalysisStep, ModelStep, Pipeline
 
 class MockStep(AnalysisStep):
     """Mock implementation of AnalysisStep for testing."""
     
-    def __init__(self, name, success=True, output=None, execution_time=0.1):
+    def __init__(self, name, success=True, output=None, execution_time=0.1, sleep=False):
         self.name = name
         self.success = success
         self.mock_output = output or {"response": f"Response from {name}"}
         self.execution_time = execution_time
+        # Without sleep, execution_time is only reported, so tests don't wait for it
+        self.sleep = sleep
         self.execute_called = False
         self.fallback_called = False
     
@@ -29,7 +31,7 @@ class MockStep(AnalysisStep):
         self.execute_called = True
         self.execute_data = data
         
-        await asyncio.sleep(self.execution_time)
+        await asyncio.sleep(self.execution_time if self.sleep else 0)
         
         if not self.success:
             return {
@@ -60,14 +62,28 @@ class MockStep(AnalysisStep):
             "fallback": True
         }
 
+class StubModelManager:
+    """Lightweight stand-in for ModelManager that records calls and returns scripted results."""
+    
+    def __init__(self, config, healthy=True, response=None):
+        self.config = config
+        self.healthy = healthy
+        self.health = {}  # Per-model overrides of healthy
+        self.response = response or {"response": "Mock model response"}
+        self.health_checks = []
+        self.generate_calls = []
+    
+    async def check_model_health(self, model_name):
+        self.health_checks.append(model_name)
+        return self.health.get(model_name, self.healthy)
+    
+    async def generate_with_model(self, model_name, prompt, options=None):
+        self.generate_calls.append((model_name, prompt, options))
+        return self.response
+
 class TestPipeline:
     """Test suite for the Pipeline class."""
     
-    @pytest.fixture
-    def config(self):
-        """Create a Config instance for testing."""
-        return Config(simulation_mode=True)
-    
     @pytest.mark.asyncio
     async def test_simple_pipeline(self, config):
         """Test a simple pipeline with one step."""
@@ -133,6 +149,57 @@ class TestPipeline:
         assert "step1" in step3.execute_data
         assert "step2" in step3.execute_data
     
+    @pytest.mark.asyncio
+    async def test_step_data_is_read_only(self, config):
+        """Test that steps get a read-only view that leaves the caller's input untouched."""
+        step1 = MockStep("step1")
+        step2 = MockStep("step2")
+        pipeline = Pipeline(
+            steps=[("step1", step1, []), ("step2", step2, ["step1"])],
+            config=config
+        )
+        
+        input_data = {"query": "Test query"}
+        await pipeline.run(input_data)
+        
+        assert input_data == {"query": "Test query"}
+        assert step2.execute_data["step1"] == {"response": "Response from step1"}
+        with pytest.raises(TypeError):
+            step2.execute_data["query"] = "Changed"
+    
+    @pytest.mark.asyncio
+    async def test_input_not_copied_per_level(self, config):
+        """Test that a multi-level run layers step outputs over the input instead of copying it."""
+        class CountingDict(dict):
+            """Dict that counts every full iteration over its contents."""
+            iterations = 0
+            
+            def __iter__(self):
+                CountingDict.iterations += 1
+                return super().__iter__()
+            
+            def keys(self):
+                CountingDict.iterations += 1
+                return super().keys()
+            
+            def items(self):
+                CountingDict.iterations += 1
+                return super().items()
+        
+        steps = [MockStep(f"step{i}") for i in range(4)]
+        pipeline = Pipeline(
+            steps=[(f"step{i}", step, [f"step{i - 1}"] if i else []) for i, step in enumerate(steps)],
+            config=config
+        )
+        
+        input_data = CountingDict(query="Test query", document="x" * 1000)
+        results = await pipeline.run(input_data)
+        
+        assert results["success_count"] == 4
+        assert CountingDict.iterations == 0
+        assert steps[3].execute_data["document"] == "x" * 1000
+        assert steps[3].execute_data["step2"] == {"response": "Response from step2"}
+    
     @pytest.mark.asyncio
     async def test_pipeline_with_failing_step(self, config):
         """Test pipeline behavior when a step fails."""
@@ -195,18 +262,89 @@ class TestPipeline:
         assert "error" in results["results"]["orphan_step"]["output"]
         assert "missing_dependencies" in results["results"]["orphan_step"]["output"]["error"]
 
+    @pytest.mark.asyncio
+    async def test_independent_steps_run_concurrently(self, config):
+        """Test that steps in the same dependency level overlap in time."""
+        branches = [MockStep(f"branch{i}", execution_time=0.2, sleep=True) for i in range(3)]
+        join_step = MockStep("join", execution_time=0.2, sleep=True)
+        
+        pipeline = Pipeline(
+            steps=[(step.name, step, []) for step in branches] + [
+                ("join", join_step, [step.name for step in branches])
+            ],
+            config=config
+        )
+        
+        start = asyncio.get_event_loop().time()
+        results = await pipeline.run({"query": "Test query"})
+        elapsed = asyncio.get_event_loop().time() - start
+        
+        assert results["success_count"] == 4
+        assert all(name in join_step.execute_data for name in ["branch0", "branch1", "branch2"])
+        # Two levels of 0.2s each, rather than four sequential steps
+        assert elapsed < 0.6
+    
+    @pytest.mark.asyncio
+    async def test_pipeline_fail_fast(self):
+        """Test that fail_fast cancels running and pending steps after a failure."""
+        config = Config(simulation_mode=True, fail_fast=True)
+        failing_step = MockStep("failing_step", success=False)
+        slow_step = MockStep("slow_step", execution_time=5, sleep=True)
+        dependent_step = MockStep("dependent_step")
+        
+        pipeline = Pipeline(
+            steps=[
+                ("failing_step", failing_step, []),
+                ("slow_step", slow_step, []),  # Runs alongside the failing step
+                ("dependent_step", dependent_step, ["failing_step"])
+            ],
+            config=config
+        )
+        
+        # The slow step must be cancelled rather than awaited
+        results = await asyncio.wait_for(pipeline.run({"query": "Test query"}), timeout=2)
+        
+        assert not dependent_step.execute_called
+        assert results["results"]["failing_step"]["status"] == "error"
+        assert results["results"]["slow_step"]["status"] == "cancelled"
+        assert results["results"]["dependent_step"]["status"] == "cancelled"
+        assert results["success_count"] == 0
+        assert results["total_count"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_pipeline_fail_fast_missing_dependency(self):
+        """Test that with fail_fast a missing dependency only cancels the steps downstream of it."""
+        config = Config(simulation_mode=True, fail_fast=True)
+        independent_step = MockStep("independent_step")
+        broken_step = MockStep("broken_step")
+        downstream_step = MockStep("downstream_step")
+        
+        pipeline = Pipeline(
+            steps=[
+                ("independent_step", independent_step, []),
+                ("broken_step", broken_step, ["non_existent_step"]),
+                ("downstream_step", downstream_step, ["broken_step"])
+            ],
+            config=config
+        )
+        
+        results = await pipeline.run({"query": "Test query"})
+        
+        assert independent_step.execute_called
+        assert not broken_step.execute_called
+        assert not downstream_step.execute_called
+        assert results["results"]["independent_step"]["status"] == "success"
+        assert results["results"]["broken_step"]["output"]["error"] == "missing_dependencies"
+        assert results["results"]["downstream_step"]["status"] == "cancelled"
+        assert results["success_count"] == 1
+
 class TestModelStep:
     """Test suite for the ModelStep class."""
     
     @pytest.fixture
-    def model_manager(self):
-        """Create a mocked ModelManager."""
-        manager = MagicMock(spec=ModelManager)
-        manager.check_model_health = AsyncMock(return_value=True)
-        manager.generate_with_model = AsyncMock(return_value={
-            "response": "Mock model response"
-        })
-        return manager
+    def model_manager(self, config):
+        """Create a stub ModelManager."""
+        return StubModelManager(config)
     
     @pytest.mark.asyncio
     async def test_model_step_execution(self, model_manager):
@@ -229,17 +367,17 @@ class TestModelStep:
         assert "prompt" in result
         
         # Verify the model manager was called correctly
-        model_manager.check_model_health.assert_called_once_with("test-model")
-        model_manager.generate_with_model.assert_called_once()
+        assert model_manager.health_checks == ["test-model"]
+        assert len(model_manager.generate_calls) == 1
         # Check the prompt was formatted correctly
-        args, kwargs = model_manager.generate_with_model.call_args
+        args = model_manager.generate_calls[0]
         assert "Answer this: What is AI?" in args
     
     @pytest.mark.asyncio
     async def test_model_step_with_unhealthy_model(self, model_manager):
         """Test ModelStep with an unhealthy model."""
         # Make the model unhealthy
-        model_manager.check_model_health.return_value = False
+        model_manager.healthy = False
         
         # Create a model step with fallbacks
         step = ModelStep(
@@ -290,10 +428,20 @@ class TestModelStep:
         result = await step.execute(data)
         
         # Verify the prompt was formatted correctly
-        args, kwargs = model_manager.generate_with_model.call_args
+        args = model_manager.generate_calls[-1]
         assert "Query: What is ML?" in args[1]
         assert "Previous Analysis: AI stands for Artificial Intelligence." in args[1]
     
+    def test_model_step_template_compiled_once(self, model_manager):
+        """Test that steps sharing a template reuse one compiled renderer."""
+        template = "Compiled once: {query}"
+        first = ModelStep(model_manager=model_manager, model_name="test-model", prompt_template=template)
+        second = ModelStep(model_manager=model_manager, model_name="other-model", prompt_template=template)
+        
+        # Each compilation builds a new function, so sharing one means it compiled once
+        assert first._render is second._render
+        assert first._render({"query": "What is ML?"}) == "Compiled once: What is ML?"
+    
     @pytest.mark.asyncio
     async def test_model_step_template_error_handling(self, model_manager):
         """Test handling of template formatting errors."""
@@ -312,22 +460,23 @@ class TestModelStep:
         assert result["status"] == "success"
         
         # Verify the prompt contains the available data
-        args, kwargs = model_manager.generate_with_model.call_args
+        args = model_manager.generate_calls[-1]
         assert "Query: What is ML?" in args[1]
     
     @pytest.mark.asyncio
     async def test_get_fallback(self, model_manager):
         """Test the fallback mechanism in ModelStep."""
-        # Set up model manager behavior for fallbacks
-        model_manager.check_model_health = AsyncMock(side_effect=[
-            False,  # First fallback is unhealthy
-            True    # Second fallback is healthy
-        ])
+        # Set up model manager behavior for fallbacks; health checks run
+        # concurrently, so health is looked up per model rather than per call
+        model_manager.health = {
+            "fallback1": False,  # First fallback is unhealthy
+            "fallback2": True    # Second fallback is healthy
+        }
         
         # Set up response for the successful fallback
-        model_manager.generate_with_model = AsyncMock(return_value={
+        model_manager.response = {
             "response": "Response from fallback model"
-        })
+        }
         
         # Create a model step with multiple fallbacks
         step = ModelStep(
@@ -346,8 +495,8 @@ class TestModelStep:
         assert result["model"] == "fallback2"  # Second fallback
         
         # Verify generate_with_model was called with the right model
-        model_manager.generate_with_model.assert_called_once_with(
+        assert model_manager.generate_calls == [(
             "fallback2", 
             "Answer: Test query", 
             {"temperature": 0.7}  # Default options
-        )
+        )]